@@ -1,530 +1,653 @@
-from flask import Flask, render_template, request
-import pandas as pd
+from flask import (Blueprint, Flask, Response, current_app, g, jsonify, render_template, request,
+                   stream_template, url_for)
+import json
+import logging
 import os
-import re
 
-app = Flask(__name__)
+# Nothing imported here pulls in pandas; it comes with the first table the
+# loading policy (or a request) loads, see create_app()
+from cutoffs import CutoffStore, ResultCache
+from cutoffs.cache import MISSING
+from cutoffs.conditional import available_encodings, compress, compress_stream, compressible, etag, source_digest
+from cutoffs.export import FORMATS, STREAMS, xlsx_available
+from cutoffs.fragments import CardFragments, card_renderer
+from cutoffs.eligibility import DEFAULT_LIMIT, MAX_LIMIT, Shortlister, parse_profile
+from cutoffs.history import CutoffHistory
+from cutoffs.memory import process_memory
+from cutoffs.metrics import REGISTRY, finish_request, server_timing, stage, start_request
+from cutoffs.query import (DEFAULT_PAGE_SIZE, GRID_PAGE_SIZE, cache_key, institute_groups, page_bounds,
+                           parse_filters, parse_page, select_rows)
+from cutoffs.records import to_rows
+from cutoffs.warmup import Loader
 
-@app.route('/')
+views = Blueprint('cutoffs', __name__)
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO').upper(),
+                    format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger(__name__)
+
+# Per-stage durations in a Server-Timing header on every response (off by default)
+send_server_timing = os.environ.get('SERVER_TIMING', '') not in ('', '0')
+
+# Every cutoff CSV, parsed and normalized once; which departments load when is up to the loading policy
+store = CutoffStore(os.path.dirname(os.path.abspath(__file__)), departments=())
+
+# eager (load everything before serving), lazy (each department on first use) or background (load in a thread)
+loading = os.environ.get('CUTOFF_LOADING', 'eager')
+
+# Pick up new or changed CSVs under data/ without restarting workers (0 disables)
+reload_interval = float(os.environ.get('CUTOFF_RELOAD_INTERVAL', '30'))
+
+# Recent query results, keyed by table content hash and canonical filters (size 0 disables)
+results = ResultCache(max_entries=int(os.environ.get('RESULT_CACHE_SIZE', '1024')),
+                      max_bytes=int(os.environ.get('RESULT_CACHE_MB', '64')) * 1024 * 1024,
+                      ttl=float(os.environ.get('RESULT_CACHE_TTL', '300')))
+store.on_reload(results.clear)
+
+# Rendered result cards, keyed by table digest and row id (size 0 disables)
+fragments = ResultCache(max_entries=int(os.environ.get('CARD_CACHE_SIZE', '100000')),
+                        max_bytes=int(os.environ.get('CARD_CACHE_MB', '64')) * 1024 * 1024, ttl=0)
+store.on_reload(fragments.clear)
+
+# Every round of a department/quota joined per cutoff line, rebuilt lazily after reloads
+history = CutoffHistory(store)
+
+# All history tables stacked for one-pass "where can I get in" shortlists
+shortlister = Shortlister(history)
+
+def preload():
+    """Build the lazily derived tables now, e.g. in a gunicorn master before it forks.
+
+    Workers forked afterwards share them (and the loaded tables) copy-on-write
+    instead of each building a private copy on first use.
+    """
+    store.require()
+    history.tables()
+    shortlister.index()
+
+# Largest roster /api/eligibility/batch accepts; bigger ones go through python -m cutoffs.batch
+batch_max_profiles = int(os.environ.get('BATCH_MAX_PROFILES', '5000'))
+# Roster formats by request Content-Type (or upload file extension)
+PROFILE_FORMATS = {
+    'application/json': 'json', 'application/x-ndjson': 'json', 'application/jsonl': 'json',
+    'text/csv': 'csv', 'application/csv': 'csv',
+    '.json': 'json', '.jsonl': 'json', '.csv': 'csv',
+}
+
+# Pages and API responses that only change with the data, the code and the query string
+CACHEABLE_ENDPOINTS = {f'{views.name}.{name}' for name in (
+    'index', 'colleges', 'colleges_grid', 'colleges_api', 'details', 'cutoff_history', 'suggest_institutes',
+    'eligibility')}
+
+# Sent with every cacheable response; s-maxage is for a CDN or shared proxy in front of the app
+cache_control = os.environ.get('CACHE_CONTROL', 'public, max-age=60, s-maxage=300, stale-while-revalidate=600')
+
+# gzip (and brotli when installed) for clients that accept it (RESPONSE_COMPRESSION=0 disables)
+encodings = available_encodings() if os.environ.get('RESPONSE_COMPRESSION', '1') != '0' else ()
+
+# Code and templates are part of every ETag, so a deploy invalidates cached pages
+code_version = source_digest(*(os.path.join(store.base_dir, name) for name in ('app.py', 'cutoffs', 'templates')))
+
+# Finished (compressed) bodies of hot responses, keyed by ETag (size 0 disables)
+responses = ResultCache(max_entries=int(os.environ.get('RESPONSE_CACHE_SIZE', '512')),
+                        max_bytes=int(os.environ.get('RESPONSE_CACHE_MB', '32')) * 1024 * 1024,
+                        ttl=float(os.environ.get('RESPONSE_CACHE_TTL', '0')))
+store.on_reload(responses.clear)
+
+# Larger bodies are still sent and compressed, just not kept
+response_cache_max_body = int(os.environ.get('RESPONSE_CACHE_BODY_KB', '1024')) * 1024
+
+
+def create_app(loading=loading):
+    """The Flask app, with the cutoff tables loaded according to ``loading`` (see :mod:`cutoffs.warmup`).
+
+    ``eager`` returns once every table is loaded; ``lazy`` and ``background``
+    return after scanning the data tree, so the app serves (and /ready
+    answers) right away. The store and caches are shared by every app in
+    the process.
+    """
+    app = Flask(__name__)
+    app.register_blueprint(views)
+    app.extensions['cutoff_cards'] = CardFragments(card_renderer(app.jinja_env), fragments)
+    app.extensions['cutoff_loader'] = Loader(store, loading, warm=(preload,)).start()
+    if reload_interval > 0:
+        store.watch(reload_interval)
+    return app
+
+
+def __getattr__(name):
+    # ``gunicorn app:app`` and ``app.app`` build the app on first access, with the CUTOFF_LOADING policy
+    if name == 'app':
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+@views.route('/')
 def index():
     return render_template('departments.html')
 
-@app.route('/colleges')
-def colleges():
-    # Get Request Parameters
-    dept_filter = request.args.get('department', 'Polytechnic')
-    round_filter = request.args.get('round', '1')
-    location_filter = request.args.get('gender', '') 
-    
-    # Load CSV Data
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
+def template_names(dept_filter, location_filter):
+    """Page template and grid/card partial family for a department and quota."""
+    # Render specific template for MCA/MBA AI/MH, otherwise standard template
     if dept_filter == 'MCA':
         if location_filter == 'AI':
-            subfolder = 'AI'
-            csv_filename = f'PG_MCA_Diploma_CAP{round_filter}_AI_Cutoff_2025_26_cleaned.csv'
-        else:
-            subfolder = 'MH'
-            # Try both spellings for Cutoff/Cuttoff
-            filenames_to_try = [
-                f'PG_MCA_CAP{round_filter}_Cuttoff_data.csv',
-                f'PG_MCA_CAP{round_filter}_Cutoff_data.csv'
-            ]
-            
-            # Check which file exists
-            csv_filename = filenames_to_try[0] # Default
-            for fname in filenames_to_try:
-                if os.path.exists(os.path.join(base_dir, 'data', 'mca', subfolder, fname)):
-                    csv_filename = fname
-                    break
-            
-        csv_path = os.path.join(base_dir, 'data', 'mca', subfolder, csv_filename)
+            return 'mca_ai.html', 'ai'
+        return 'mca_mh.html', 'mh'
     elif dept_filter == 'MBA':
         if location_filter == 'AI':
-            subfolder = 'AI'
-            csv_filename = f'MBA_CAP{round_filter}_AI - MBA_CAP{round_filter}_AI.csv'  # Assuming similar naming
-        else:
-            subfolder = 'MH'
-            csv_filename = f'MBA_CAP{round_filter}_MHCutOff_2023_24 - MBA_CAP{round_filter}_MHCutOff_2023_24.csv'
-            
-        csv_path = os.path.join(base_dir, 'data', 'mba', subfolder, csv_filename)
+            return 'mba_ai.html', 'ai'
+        return 'mba_mh.html', 'mh'
     elif dept_filter == 'MTECH':
-        # Only load data if round is explicitly selected
-        if request.args.get('round') is None:
-            csv_path = ""
-        else:
-            csv_filename = f'cap{round_filter}.csv'
-            csv_path = os.path.join(base_dir, 'data', 'MTECH_ME', csv_filename)
+        return 'mtech.html', 'mtech'
     elif dept_filter == 'BCA':
         if location_filter == 'AI':
-            subfolder = 'AI'
-        else:
-            subfolder = 'MH'
-            
-        search_dir = os.path.join(base_dir, 'data', 'bca', subfolder)
-        csv_filename = f'cap{round_filter}.csv' # Default fallback for AI
-        
-        if os.path.exists(search_dir):
-            # Try to find file matching CAP round
-            for fname in os.listdir(search_dir):
-                # Match 'cap1', 'CAP1', 'BCA_CAP1', etc.
-                if fname.endswith('.csv') and f'cap{round_filter}' in fname.lower():
-                    csv_filename = fname
-                    break
-            
-            # Fallback: If specific round file not found, take the first CSV found
-            if not os.path.exists(os.path.join(search_dir, csv_filename)):
-                for fname in os.listdir(search_dir):
-                    if fname.endswith('.csv'):
-                        csv_filename = fname
-                        break
-        
-        csv_path = os.path.join(search_dir, csv_filename)
-    else:
-        csv_filename = f'polytechnic_cutoff_data_cap_{round_filter}.csv'
-        csv_path = os.path.join(base_dir, 'data', 'polytechnic', csv_filename)
-        
-    print(f"DEBUG: Attempting to load CSV from: {csv_path}")
-    
+            return 'bca_ai.html', 'bca_ai'
+        return 'bca_mh.html', 'mh'
+    return 'doctors.html', 'polytechnic'
+
+
+def lookup_table(filters):
+    # MTech only loads data if round is explicitly selected
+    if filters['department'] == 'MTECH' and not filters['round_selected']:
+        return None
+    with stage('resolve'):
+        return store.get(filters['department'], filters['gender'], filters['round'])
+
+
+def table_label(table):
+    """The table's CSV relative to data/, for per-table metrics."""
+    return os.path.relpath(table.path, store.data_dir)
+
+
+def college_results(table, filters, page=1, per_page=0):
+    """Row ids of one page of cards, plus the total count.
+
+    MTech cards group all cutoffs of an institute, so MTech pages are a
+    list of row id arrays and count institutes rather than rows.
+    ``per_page=0`` returns everything. Repeat queries are answered from
+    the result cache.
+    """
+    if table is None:
+        return [], 0
+    key = ('colleges', table.path, table.digest, cache_key(filters), page, per_page)
+    return results.get_or_compute(key, lambda: _college_results(table, filters, page, per_page),
+                                  label=table_label(table))
+
+
+def _college_results(table, filters, page, per_page):
+    # Filtering Logic: matching row ids, already sorted by percentile descending
+    rows = select_rows(table, filters)
+
+    if filters['department'] == 'MTECH':
+        # Grouping Logic for MTech (Group by College)
+        groups = institute_groups(table, rows)
+        start, stop = page_bounds(len(groups), page, per_page)
+        return groups[start:stop], len(groups)
+
+    start, stop = page_bounds(len(rows), page, per_page)
+    return rows[start:stop], len(rows)
+
+
+def college_cards(table, filters, family, page, per_page):
+    """``(card HTML fragments, total)`` for one page; the grid partials join the fragments."""
+    groups, total = college_results(table, filters, page, per_page)
+    if not len(groups):
+        return [], total
+    cards = current_app.extensions['cutoff_cards']
+    return cards.cards(table, family, filters['department'], filters['gender'], groups,
+                       grouped=filters['department'] == 'MTECH'), total
+
+
+def page_context(total, page, per_page, shown):
+    """Paging values for the grid partials; ``next_page_url`` feeds infinite scroll."""
+    next_page_url = None
+    shown += (page - 1) * per_page
+    if per_page and shown < total:
+        args = request.args.to_dict()
+        args.update(page=page + 1, per_page=per_page)
+        next_page_url = url_for('.colleges_grid', **args)
+    return {'total': total, 'page': page, 'per_page': per_page, 'shown': shown,
+            'next_page_url': next_page_url}
+
+
+def chunked(parts, size=16 * 1024, timing='render'):
+    """Join Jinja's many small stream fragments into ~``size`` character writes.
+
+    Producing the parts is timed as stage ``timing``. Most of it runs after
+    the headers are sent, so Server-Timing only covers the first chunk;
+    /metrics has the full duration.
+    """
+    with stage(timing):
+        buffer, buffered = [], 0
+        for part in parts:
+            buffer.append(part)
+            buffered += len(part)
+            if buffered >= size:
+                yield ''.join(buffer)
+                buffer, buffered = [], 0
+        if buffer:
+            yield ''.join(buffer)
+
+
+def paging_headers(paging):
+    return {'X-Total-Count': str(paging['total']), 'X-Page': str(paging['page']),
+            'X-Per-Page': str(paging['per_page'])}
+
+
+@views.route('/colleges')
+def colleges():
+    # Get Request Parameters
+    filters = parse_filters(request.args)
+    dept_filter = filters['department']
+    round_filter = filters['round']
+    location_filter = filters['gender']
+
+    # Look up the preloaded, normalized table for this department/quota/round
+    table = lookup_table(filters)
+
     # Initialize empty list and specialties
-    filtered_doctors = []
     specialties = []
     categories = []
     seat_types = []
     universities = []
     quotas = []
     areas = []
-    
-    if os.path.exists(csv_path):
-        try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
-        except UnicodeDecodeError:
-            df = pd.read_csv(csv_path, encoding='cp1252')
-            
-        # Normalize columns (lowercase, remove spaces) to match code expectations
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
-        print(f"DEBUG: Columns found: {df.columns.tolist()}")
-        
-        # Handle 'All India Merit' specifically for BCA AI (e.g. "1234(98.5)")
-        if 'all_india_merit' in df.columns:
-            def parse_merit(val):
-                s = str(val)
-                nums = re.findall(r"[\d\.]+", s)
-                if len(nums) >= 2:
-                    return int(nums[0]), float(nums[1]) # Rank, Percentile
-                elif len(nums) == 1:
-                    return int(nums[0]), 0.0
-                return 0, 0.0
-            
-            # Apply parsing
-            parsed_data = df['all_india_merit'].apply(lambda x: pd.Series(parse_merit(x)))
-            df['rank'] = parsed_data[0]
-            df['percentile'] = parsed_data[1]
-
-        # Handle AI file specific column names for cutoff score (Merit Marks/Score -> Percentile)
-        if 'percentile' not in df.columns:
-            if 'merit_marks' in df.columns:
-                df['percentile'] = df['merit_marks']
-            elif 'score' in df.columns:
-                df['percentile'] = df['score']
-            elif 'merit' in df.columns:
-                df['percentile'] = df['merit']
-            elif 'marks_percentile' in df.columns:
-                df['percentile'] = df['marks_percentile']
-            elif 'hsc_percentage' in df.columns:
-                df['percentile'] = df['hsc_percentage']
-            elif 'percentage' in df.columns:
-                df['percentile'] = df['percentage']
-            elif 'hsc_marks' in df.columns:
-                df['percentile'] = df['hsc_marks']
-            else:
-                df['percentile'] = 0.0 # Fallback to prevent KeyError
-
-        # Extract score from brackets if present (e.g. "(50.5)")
-        if 'percentile' in df.columns and df['percentile'].dtype == 'object':
-            extracted = df['percentile'].astype(str).str.extract(r'\(([\d\.]+)\)')[0]
-            df['percentile'] = extracted.fillna(df['percentile'])
-
-        # Handle Rank aliases
-        if 'rank' not in df.columns:
-            if 'merit_no' in df.columns:
-                df['rank'] = df['merit_no']
-            elif 'merit_rank' in df.columns:
-                df['rank'] = df['merit_rank']
-            elif 'merit_score' in df.columns:
-                df['rank'] = df['merit_score']
-
-        # Handle Institution Name aliases (AI files)
-        if 'institute_name' not in df.columns and 'institution_name' in df.columns:
-            df['institute_name'] = df['institution_name']
-        
-        # Handle MH file specific column names
-        if 'institute_name' not in df.columns:
-            if 'name_of_institute' in df.columns:
-                df['institute_name'] = df['name_of_institute']
-            elif 'college_name' in df.columns:
-                df['institute_name'] = df['college_name']
-            elif 'institute' in df.columns:
-                df['institute_name'] = df['institute']
-            elif 'name' in df.columns:
-                df['institute_name'] = df['name']
-            elif 'college_name' in df.columns:
-                df['institute_name'] = df['college_name']
-        
-        # Handle Course Name aliases (Common in BCA files)
-        if 'course_name' not in df.columns:
-            if 'branch' in df.columns:
-                df['course_name'] = df['branch']
-            elif 'course' in df.columns:
-                df['course_name'] = df['course']
-            elif 'subject' in df.columns:
-                df['course_name'] = df['subject']
-
-        # Handle Seat Type aliases (AI files)
-        if 'seat_type' not in df.columns and 'type' in df.columns:
-            df['seat_type'] = df['type']
-            
-        # Handle Choice Code as Institute Code (User specified)
-        if 'institute_code' not in df.columns and 'choice_code' in df.columns:
-            df['institute_code'] = df['choice_code']
-            
-        # Handle Branch Code alias
-        if 'choice_code' not in df.columns and 'branch_code' in df.columns:
-            df['choice_code'] = df['branch_code']
-
-        # Handle Category alias (e.g. category1)
-        if 'category' not in df.columns and 'category1' in df.columns:
-            df['category'] = df['category1']
-
-        # Ensure numeric columns are actually numbers
-        if 'percentile' in df.columns:
-            df['percentile'] = pd.to_numeric(df['percentile'], errors='coerce')
-        if 'rank' in df.columns:
-            df['rank'] = pd.to_numeric(df['rank'], errors='coerce')
-        
-        # Get unique courses for the dropdown from CSV
-        if 'course_name' in df.columns:
-            courses = sorted(df['course_name'].dropna().unique().tolist())
-            if courses:
-                specialties = [{"name": c, "icon": "🎓"} for c in courses]
-        
-        # Get unique categories and seat types
-        if 'category' in df.columns:
-            cats = sorted(df['category'].dropna().unique().tolist())
-            if cats:
-                categories = cats
-        if 'seat_type' in df.columns:
-            seats = sorted(df['seat_type'].dropna().unique().tolist())
-            if seats:
-                seat_types = seats
-        
-        # Get unique universities (for MH)
-        if 'university' in df.columns:
-            unis = sorted(df['university'].dropna().unique().tolist())
-            if unis:
-                universities = unis
-        
-        # Get unique quotas
-        if 'quota' in df.columns:
-            qs = sorted(df['quota'].dropna().unique().tolist())
-            if qs:
-                quotas = qs
-        
-        # Extract Area from Institute Name (Format: "Name, Area")
-        if 'institute_name' in df.columns:
-            # Split by comma and take the last part as Area
-            df['area'] = df['institute_name'].astype(str).apply(lambda x: x.split(',')[-1].strip() if ',' in x else 'Others')
-            unique_areas = sorted(df['area'].unique().tolist())
-            
-            # Move 'Others' to the end
-            if 'Others' in unique_areas:
-                unique_areas.remove('Others')
-                unique_areas.append('Others')
-
-            if unique_areas:
-                areas = unique_areas
-    else:
-        print("DEBUG: CSV file not found!")
-        df = pd.DataFrame()
-    
-    # Filtering Logic
-    search_query = request.args.get('search', '').lower()
-    specialty_filter = request.args.get('specialty', '')
-    cutoff_filter = request.args.get('experience', '') or request.args.get('percentile', '') # Using experience field for Cutoff
-    rank_filter = request.args.get('rank', '') or request.args.get('merit_score', '')
-    min_rank_filter = request.args.get('min_rank', '')
-    max_rank_filter = request.args.get('max_rank', '')
-    category_filter = request.args.get('category', '')
-    seat_type_filter = request.args.get('seat_type', '')
-    university_filter = request.args.get('university', '')
-    area_filter = request.args.get('area', '')
-
-    # Determine if we should load data (MCA and MBA allow loading without specialty)
-    is_mca_or_mba = (dept_filter in ['MCA', 'MBA', 'BCA'])
-    
-    if (specialty_filter or is_mca_or_mba) and not df.empty:
-        # Filter by Branch (Exact Match)
-        temp_df = df
-        if specialty_filter:
-            temp_df = temp_df[temp_df['course_name'] == specialty_filter]
-
-        # Filter by Search (Institute Name)
-        if search_query and 'institute_name' in temp_df.columns:
-            temp_df = temp_df[temp_df['institute_name'].str.lower().str.contains(search_query, na=False)]
-            
-        # Filter by Area
-        if area_filter and 'area' in temp_df.columns:
-            temp_df = temp_df[temp_df['area'] == area_filter]
-
-        # Enforce Rank Range selection for MCA MH and MBA MH (Don't show colleges until Rank Range is selected)
-        if ((dept_filter == 'MCA' and location_filter != 'AI') or (dept_filter == 'MBA' and location_filter != 'AI') or (dept_filter == 'BCA' and location_filter != 'AI')) and not (request.args.get('min_rank') and request.args.get('max_rank')):
-            temp_df = temp_df.iloc[0:0]
-
-        # Filter by Quota (Location)
-        # Ignore 'MH' as it is used for file selection, not row filtering
-        # For BCA AI, skip strict quota filtering to ensure data shows from the AI file
-        if location_filter and location_filter != 'MH' and 'quota' in temp_df.columns and not (dept_filter == 'BCA' and location_filter == 'AI'):
-            if location_filter == 'AI':
-                # Match 'AI', 'All India', etc. case-insensitive
-                temp_df = temp_df[temp_df['quota'].str.contains(r'AI|All India', case=False, na=False)]
-            else:
-                temp_df = temp_df[temp_df['quota'].str.contains(location_filter, na=False)]
-
-        # Filter by Cutoff (Percentile)
-        if cutoff_filter:
-            try:
-                user_marks = float(cutoff_filter)
-                # Show colleges where cutoff is <= user marks
-                temp_df = temp_df[temp_df['percentile'] <= user_marks]
-            except ValueError:
-                pass
-
-        # Filter by Rank (Single Value)
-        if rank_filter and 'rank' in temp_df.columns:
-            try:
-                user_rank = float(rank_filter)
-                # Show colleges where cutoff rank >= user rank (User eligible)
-                temp_df = temp_df[temp_df['rank'] >= user_rank]
-            except ValueError:
-                pass
-        
-        # Filter by Rank Range
-        if min_rank_filter and max_rank_filter:
-            try:
-                min_rank = float(min_rank_filter)
-                max_rank = float(max_rank_filter)
-                if 'rank' in temp_df.columns:
-                    temp_df = temp_df[(temp_df['rank'] >= min_rank) & (temp_df['rank'] <= max_rank)]
-            except ValueError:
-                pass
-        
-        # Filter by Single Rank (My Rank) - Show colleges where cutoff rank is higher (easier) than user rank
-        if rank_filter and not (min_rank_filter or max_rank_filter):
-            try:
-                user_rank = float(rank_filter)
-                if 'rank' in temp_df.columns:
-                    temp_df = temp_df[temp_df['rank'] >= user_rank]
-            except ValueError:
-                pass
-
-        # Filter by Category
-        if category_filter and 'category' in temp_df.columns:
-            temp_df = temp_df[temp_df['category'] == category_filter]
-
-        # Filter by Seat Type
-        if seat_type_filter and 'seat_type' in temp_df.columns:
-            temp_df = temp_df[temp_df['seat_type'] == seat_type_filter]
-        
-        # Filter by University
-        if university_filter and 'university' in temp_df.columns:
-            temp_df = temp_df[temp_df['university'] == university_filter]
-        
-        # Sort by percentile descending
-        if 'percentile' in temp_df.columns:
-            temp_df = temp_df.sort_values(by='percentile', ascending=False)
-
-        # Convert to dictionary list for template
-        for _, row in temp_df.iterrows():
-            doc_dict = row.to_dict()
-            # Clean NaNs for JSON serialization
-            for k, v in doc_dict.items():
-                if pd.isna(v):
-                    doc_dict[k] = None
-            
-            doc_dict.update({
-                "institute_code": row.get('institute_code', 'N/A'),
-                "choice_code": row.get('choice_code', 'N/A'),
-                "name": row.get('institute_name', 'Unknown Institute'),
-                "specialty": row.get('course_name', 'BCA' if dept_filter == 'BCA' else 'MTECH' if dept_filter == 'MTECH' else 'MBA' if dept_filter == 'MBA' else 'MCA' if dept_filter == 'MCA' else 'N/A'),
-                "experience": row.get('percentile', 0),      # Cutoff
-                "gender": row.get('quota', location_filter if location_filter else 'N/A'), # Quota/Location
-                "qualification": row.get('category', 'N/A'),     # Category
-                "consultation_type": row.get('seat_type', 'N/A'),# Seat Type
-                "rank": row.get('rank', 'N/A'),
-                "stage": row.get('stage', 'N/A'),
-                "image": "", # Placeholder
-                "percentile": row.get('percentile', 'N/A'),
-                "merit_score": row.get('rank', 'N/A'),
-                "university": row.get('university', 'N/A'),
-                "status": row.get('status', 'N/A')
-            })
-            filtered_doctors.append(doc_dict)
+    facet_counts = {}
 
-    # Render specific template for MCA/MBA AI/MH, otherwise standard template
-    if dept_filter == 'MCA':
-        if location_filter == 'AI':
-            template_name = 'mca_ai.html'
-        else:
-            template_name = 'mca_mh.html'
-    elif dept_filter == 'MBA':
-        if location_filter == 'AI':
-            template_name = 'mba_ai.html'
-        else:
-            template_name = 'mba_mh.html'
-    elif dept_filter == 'MTECH':
-        template_name = 'mtech.html'
-        
-        # Grouping Logic for MTech (Group by College)
-        grouped = {}
-        for doc in filtered_doctors:
-            code = doc['institute_code']
-            if code not in grouped:
-                grouped[code] = doc.copy()
-                grouped[code]['cutoffs'] = []
-            grouped[code]['cutoffs'].append(doc)
-        filtered_doctors = list(grouped.values())
-    elif dept_filter == 'BCA':
-        if location_filter == 'AI':
-            template_name = 'bca_ai.html'
-        else:
-            template_name = 'bca_mh.html'
+    if table is not None:
+        logger.debug("Using cutoff table %s", table.path)
+
+        # Dropdown values are computed once when the table is loaded
+        specialties = [{"name": c, "icon": "🎓"} for c in table.courses]
+        categories = table.categories
+        seat_types = table.seat_types
+        universities = table.universities
+        quotas = table.quotas
+        areas = table.areas
+        facet_counts = table.facet_counts
     else:
-        template_name = 'doctors.html'
+        logger.debug("No cutoff table for %s %s round %s", dept_filter, location_filter, round_filter)
+
+    # Only the first page is rendered; the grid fetches the rest as it scrolls
+    page, per_page = parse_page(request.args, default_per_page=GRID_PAGE_SIZE)
+    template_name, family = template_names(dept_filter, location_filter)
+    grid, total = college_cards(table, filters, family, page, per_page)
+    paging = page_context(total, page, per_page, len(grid))
 
-    return render_template(template_name, 
-                           doctors=filtered_doctors, 
+    # Stream the page so the header and first cards go out while the rest renders
+    return chunked(stream_template(template_name, 
+                           cards=grid, 
+                           **paging,
                            specialties=specialties,
                            categories=categories,
                            seat_types=seat_types,
                            universities=universities,
                            quotas=quotas,
                            areas=areas,
-                           selected_specialty=specialty_filter,
+                           facet_counts=facet_counts,
+                           selected_specialty=filters['specialty'],
                            selected_department=dept_filter,
                            selected_gender=location_filter,
-                           selected_experience=cutoff_filter,
-                           selected_rank=rank_filter,
-                           selected_min_rank=min_rank_filter,
-                           selected_max_rank=max_rank_filter,
-                           selected_category=category_filter,
-                           selected_seat_type=seat_type_filter,
-                           selected_university=university_filter,
-                           selected_area=area_filter,
-                           selected_round=request.args.get('round') if dept_filter == 'MTECH' else round_filter)
-
-@app.route('/details')
+                           selected_experience=filters['experience'],
+                           selected_rank=filters['rank'],
+                           selected_min_rank=filters['min_rank'],
+                           selected_max_rank=filters['max_rank'],
+                           selected_category=filters['category'],
+                           selected_seat_type=filters['seat_type'],
+                           selected_university=filters['university'],
+                           selected_area=filters['area'],
+                           selected_round=request.args.get('round') if dept_filter == 'MTECH' else round_filter)), paging_headers(paging)
+
+@views.route('/colleges/grid')
+def colleges_grid():
+    """Only the #doctorsGrid contents, for the live filters in the templates."""
+    filters = parse_filters(request.args)
+    page, per_page = parse_page(request.args, default_per_page=GRID_PAGE_SIZE)
+    _, family = template_names(filters['department'], filters['gender'])
+    grid, total = college_cards(lookup_table(filters), filters, family, page, per_page)
+    paging = page_context(total, page, per_page, len(grid))
+
+    return chunked(stream_template(f'partials/{family}_grid.html',
+                                   cards=grid,
+                                   selected_specialty=filters['specialty'],
+                                   **paging)), paging_headers(paging)
+
+@views.route('/api/colleges')
+def colleges_api():
+    """Compact JSON rows for a /colleges query, one page at a time."""
+    filters = parse_filters(request.args)
+    page, per_page = parse_page(request.args, default_per_page=DEFAULT_PAGE_SIZE)
+    table = lookup_table(filters)
+
+    def page_rows():
+        rows = select_rows(table, filters)
+        start, stop = page_bounds(len(rows), page, per_page)
+        with stage('materialize'):
+            return to_rows(table.df.take(rows[start:stop])), len(rows)
+
+    rows, total = [], 0
+    if table is not None:
+        key = ('api', table.path, table.digest, cache_key(filters), page, per_page)
+        rows, total = results.get_or_compute(key, page_rows, label=table_label(table))
+    return jsonify({
+        'department': filters['department'],
+        'round': filters['round'],
+        'total': total,
+        'page': page,
+        'per_page': per_page,
+        'rows': rows,
+    })
+
+@views.route('/colleges/export')
+def export_colleges():
+    """Every row matching the /colleges filters as a CSV, JSON Lines or XLSX download."""
+    filters = parse_filters(request.args)
+    fmt = request.args.get('format', 'csv').lower()
+    if fmt not in FORMATS:
+        return jsonify({'error': f"Unknown format {fmt!r}; use one of {', '.join(FORMATS)}"}), 400
+    if fmt == 'xlsx' and not xlsx_available():
+        return jsonify({'error': 'XLSX export needs openpyxl (pip install openpyxl)'}), 501
+    table = lookup_table(filters)
+    if table is None:
+        return jsonify({'error': 'No cutoff data for this department, quota and round'}), 404
+
+    rows = select_rows(table, filters, gated=False)
+
+    def stream():
+        # Chunks are large already; text or (XLSX) bytes go out as produced
+        with stage('export'):
+            yield from STREAMS[fmt](table, rows)
+
+    mimetype, extension = FORMATS[fmt]
+    name = '_'.join(part for part in (filters['department'], filters['gender'], f"cap{filters['round']}") if part)
+    return Response(stream(), mimetype=mimetype,
+                    headers={'Content-Disposition': f'attachment; filename="cutoffs_{name.lower()}.{extension}"',
+                             'X-Total-Count': str(len(rows))})
+
+@views.route('/api/institutes/suggest')
+def suggest_institutes():
+    """Autocomplete for the search box: top ``k`` institutes matching ``q``."""
+    filters = parse_filters(request.args)
+    table = store.get(filters['department'], filters['gender'], filters['round'])
+    try:
+        k = min(max(int(request.args.get('k', 8)), 1), 20)
+    except ValueError:
+        k = 8
+    suggestions = table.search.suggest(request.args.get('q', ''), k) if table is not None else []
+    return jsonify({'query': request.args.get('q', ''), 'suggestions': suggestions})
+
+@views.route('/details')
 def details():
     dept_filter = request.args.get('department', 'MCA')
     round_filter = request.args.get('round', '1')
     location_filter = request.args.get('gender', '')
     institute_code = request.args.get('code')
 
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    if dept_filter == 'MCA':
-        if location_filter == 'AI':
-            subfolder = 'AI'
-            csv_filename = f'PG_MCA_Diploma_CAP{round_filter}_AI_Cutoff_2025_26_cleaned.csv'
-        else:
-            subfolder = 'MH'
-            # Try both spellings for Cutoff/Cuttoff
-            filenames_to_try = [
-                f'PG_MCA_CAP{round_filter}_Cuttoff_data.csv',
-                f'PG_MCA_CAP{round_filter}_Cutoff_data.csv'
-            ]
-            
-            # Check which file exists
-            csv_filename = filenames_to_try[0] # Default
-            for fname in filenames_to_try:
-                if os.path.exists(os.path.join(base_dir, 'data', 'mca', subfolder, fname)):
-                    csv_filename = fname
-                    break
-        csv_path = os.path.join(base_dir, 'data', 'mca', subfolder, csv_filename)
-    elif dept_filter == 'MTECH':
-        csv_filename = f'cap{round_filter}.csv'
-        csv_path = os.path.join(base_dir, 'data', 'MTECH_ME', csv_filename)
-    elif dept_filter == 'MBA':
-        if location_filter == 'AI':
-            subfolder = 'AI'
-            csv_filename = f'MBA_CAP{round_filter}_AI - MBA_CAP{round_filter}_AI.csv'
-        else:
-            subfolder = 'MH'
-            csv_filename = f'MBA_CAP{round_filter}_MHCutOff_2023_24 - MBA_CAP{round_filter}_MHCutOff_2023_24.csv'
-        csv_path = os.path.join(base_dir, 'data', 'mba', subfolder, csv_filename)
-    elif dept_filter == 'BCA':
-        if location_filter == 'AI':
-            subfolder = 'AI'
+    college_details = []
+    college_info = {}
+
+    from cutoffs.ingest import canonical_code
+
+    # round=all shows every CAP round side by side from the history table
+    if round_filter == 'all':
+        table = history.get(dept_filter, location_filter)
+        rows = table.lookup(canonical_code(institute_code)) if table is not None and institute_code else []
+        if rows:
+            college_info = {
+                "code": rows[0]['institute_code'],
+                "name": rows[0]['institute_name'] or 'Unknown',
+                "university": rows[0]['university'] or 'N/A'
+            }
+        with stage('render'):
+            return render_template('details.html', info=college_info, cutoffs=[], history=rows,
+                                   rounds=table.rounds if table is not None else [])
+
+    summary = None
+    table = store.get(dept_filter, location_filter, round_filter)
+    if table is not None:
+        key = ('details', table.path, table.digest, institute_code)
+        college_info, college_details, summary = results.get_or_compute(
+            key, lambda: institute_details(table, institute_code), label=table_label(table))
+
+    all_rounds_url = url_for('.details', **dict(request.args.to_dict(), round='all'))
+    with stage('render'):
+        return render_template('details.html', info=college_info, cutoffs=college_details,
+                               summary=summary, all_rounds_url=all_rounds_url)
+
+def institute_details(table, institute_code):
+    """``(college_info, cutoff rows, summary)`` for one institute of a table."""
+    if table is None or table.institutes is None or not institute_code:
+        return {}, [], None
+    from cutoffs.ingest import canonical_code
+
+    # Codes were canonicalized at load; bring the argument into the same form
+    code = canonical_code(institute_code)
+    summary = table.institutes.summary(code)
+    if summary is None:
+        return {}, [], None
+    with stage('materialize'):
+        college_details = table.df.take(table.institutes.rows(code)).to_dict('records')
+    college_info = {"code": code, "name": summary['name'], "university": summary['university']}
+    return college_info, college_details, summary
+
+@views.route('/api/history')
+def cutoff_history():
+    """Cutoff trajectory across rounds for an institute or choice/branch ``code``."""
+    from cutoffs.ingest import canonical_code
+
+    dept_filter = request.args.get('department', 'MCA')
+    location_filter = request.args.get('gender', '')
+    table = history.get(dept_filter, location_filter)
+    code = canonical_code(request.args.get('code'))
+
+    rows = []
+    if table is not None and code:
+        rows = table.lookup(code, category=request.args.get('category'), year=request.args.get('year'))
+    return jsonify({
+        'department': dept_filter,
+        'quota': table.quota if table is not None else None,
+        'rounds': table.rounds if table is not None else [],
+        'rows': rows,
+    })
+
+@views.route('/api/eligibility')
+def eligibility():
+    """Every department, quota and round a rank/percentile profile gets into, best first."""
+    try:
+        profile = parse_profile(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    # Shortlists span every department
+    store.require()
+    index = shortlister.index()
+    key = ('eligibility', index.generation, tuple(sorted(
+        (name, tuple(value) if isinstance(value, list) else value) for name, value in profile.items())), limit)
+    total, options = results.get_or_compute(key, lambda: index.shortlist(profile, limit))
+    return jsonify({
+        'profile': profile,
+        'total': total,
+        'shown': len(options),
+        'options': options,
+    })
+
+@views.route('/api/eligibility/batch', methods=['POST'])
+def eligibility_batch():
+    """Shortlists for a roster of profiles (JSON, JSON Lines or CSV body or ``file`` upload).
+
+    Streams one JSON line per student, in roster order.
+    """
+    from cutoffs.batch import evaluate, read_profiles
+
+    upload = request.files.get('file')
+    try:
+        if upload is not None:
+            extension = os.path.splitext(upload.filename or '')[1].lower()
+            fmt = PROFILE_FORMATS.get(upload.mimetype) or PROFILE_FORMATS.get(extension)
+            profiles = read_profiles(upload.read(), fmt)
         else:
-            subfolder = 'MH'
-            
-        search_dir = os.path.join(base_dir, 'data', 'bca', subfolder)
-        csv_filename = f'BCA_CAP{round_filter}_{subfolder}.csv'
-        
-        if os.path.exists(search_dir):
-            # Try to find file matching CAP round
-            for fname in os.listdir(search_dir):
-                if fname.endswith('.csv') and f'CAP{round_filter}' in fname:
-                    csv_filename = fname
-                    break
-            # Fallback
-            if not os.path.exists(os.path.join(search_dir, csv_filename)):
-                for fname in os.listdir(search_dir):
-                    if fname.endswith('.csv'):
-                        csv_filename = fname
-                        break
-        csv_path = os.path.join(search_dir, csv_filename)
+            # The declared type wins; only an untyped (or generic) body is sniffed
+            profiles = read_profiles(request.get_data(), PROFILE_FORMATS.get(request.mimetype))
+    except ValueError as e:
+        return jsonify({'error': f'Could not read profiles: {e}'}), 400
+    if len(profiles) > batch_max_profiles:
+        return jsonify({'error': f'At most {batch_max_profiles} profiles per request'}), 413
+    try:
+        limit = min(max(int(request.args.get('limit', DEFAULT_LIMIT)), 1), MAX_LIMIT)
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    # Shortlists span every department
+    store.require()
+    index = shortlister.index()
+    lines = (json.dumps(result) + '\n' for result in evaluate(index, profiles, limit))
+    return Response(chunked(lines, timing='batch'), mimetype='application/x-ndjson',
+                    headers={'X-Total-Count': str(len(profiles))})
+
+@views.route('/data/status')
+def data_status():
+    return jsonify(dict(store.stats(), result_cache=results.stats(), response_cache=responses.stats(),
+                        card_cache=fragments.stats(),
+                        pid=os.getpid(), memory=process_memory()))
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'cutoff_request_seconds', 'Time to response headers per route', ('route', 'method', 'status'))
+
+
+def table_rows():
+    seen = set()
+    for dataset in store.datasets():
+        table = store.get(dataset.department, dataset.quota, dataset.round, year=dataset.year)
+        if table is not None and table.path not in seen:
+            seen.add(table.path)
+            yield (table_label(table), dataset.department, dataset.quota, dataset.round), len(table)
+
+
+def cache_counts(position):
+    return [((label,), counts[position]) for label, counts in list(results.by_label.items())]
+
+
+REGISTRY.gauge('cutoff_table_rows', 'Rows per loaded cutoff table',
+               ('table', 'department', 'quota', 'round'), collect=table_rows)
+REGISTRY.gauge('cutoff_result_cache_hits_total', 'Result cache hits per table', ('table',),
+               collect=lambda: cache_counts(0), kind='counter')
+REGISTRY.gauge('cutoff_result_cache_misses_total', 'Result cache misses per table', ('table',),
+               collect=lambda: cache_counts(1), kind='counter')
+REGISTRY.gauge('cutoff_result_cache_hit_ratio', 'Result cache hit ratio per table, and overall (table="")',
+               ('table',), collect=lambda: [((label,), value['hit_ratio']) for label, value in
+                                            results.stats()['by_label'].items()]
+               + [(('',), results.stats()['hit_ratio'])])
+REGISTRY.gauge('cutoff_result_cache_entries', 'Entries in the result cache', collect=lambda: [((), results.stats()['entries'])])
+REGISTRY.gauge('cutoff_result_cache_bytes', 'Estimated bytes held by the result cache', collect=lambda: [((), results.bytes)])
+REGISTRY.gauge('cutoff_result_cache_evictions_total', 'Result cache evictions',
+               collect=lambda: [((), results.evictions)], kind='counter')
+REGISTRY.gauge('cutoff_response_cache_hits_total', 'Responses served from the response cache',
+               collect=lambda: [((), responses.hits)], kind='counter')
+REGISTRY.gauge('cutoff_response_cache_misses_total', 'Cacheable responses rendered from the tables',
+               collect=lambda: [((), responses.misses)], kind='counter')
+REGISTRY.gauge('cutoff_response_cache_bytes', 'Bytes of response bodies held by the response cache',
+               collect=lambda: [((), responses.bytes)])
+REGISTRY.gauge('cutoff_card_cache_hits_total', 'Result cards served pre-rendered',
+               collect=lambda: [((), fragments.hits)], kind='counter')
+REGISTRY.gauge('cutoff_card_cache_misses_total', 'Result cards rendered from the tables',
+               collect=lambda: [((), fragments.misses)], kind='counter')
+REGISTRY.gauge('cutoff_card_cache_bytes', 'Bytes of rendered cards held by the card cache',
+               collect=lambda: [((), fragments.bytes)])
+REGISTRY.gauge('cutoff_store_version', 'Cutoff data version, bumped on every reload', collect=lambda: [((), store.version)])
+REGISTRY.gauge('cutoff_store_load_seconds', 'Duration of the last cutoff data (re)load',
+               collect=lambda: [((), store.last_load_duration)])
+
+@views.before_app_request
+def start_timing():
+    g.timing = start_request()
+
+@views.after_app_request
+def record_timing(response):
+    token = g.pop('timing', None)
+    if token is None:
+        return response
+    stages, total = finish_request(token)
+    route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    REQUEST_SECONDS.observe(total, route=route, method=request.method, status=response.status_code)
+    if send_server_timing:
+        response.headers['Server-Timing'] = server_timing(stages, total)
+    return response
+
+@views.before_app_request
+def conditional_get():
+    """Answer repeat requests from the ETag or the response cache, before any table is touched."""
+    if request.method not in ('GET', 'HEAD') or request.endpoint not in CACHEABLE_ENDPOINTS:
+        return None
+    encoding = request.accept_encodings.best_match(encodings) if encodings else None
+    g.etag = etag(store.fingerprint, code_version, request.path, request.args, encoding)
+    g.encoding = encoding
+
+    if request.if_none_match.contains_weak(g.etag):
+        return Response(status=304)
+    cached = responses.get(g.etag)
+    if cached is not MISSING:
+        g.cached = True
+        body, headers = cached
+        return Response(body, headers=headers)
+    return None
+
+@views.after_app_request
+def cache_headers(response):
+    """ETag and Cache-Control on cacheable responses; compress and keep fresh 200 bodies."""
+    tag = g.pop('etag', None)
+    encoding = g.pop('encoding', None)
+    if tag is None or response.status_code not in (200, 304):
+        return response
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = cache_control
+    if encodings:
+        response.vary.add('Accept-Encoding')
+    if response.status_code == 304 or g.pop('cached', False):
+        return response
+
+    if encoding and compressible(response.mimetype):
+        response.headers['Content-Encoding'] = encoding
     else:
-        csv_filename = f'polytechnic_cutoff_data_cap_{round_filter}.csv'
-        csv_path = os.path.join(base_dir, 'data', 'polytechnic', csv_filename)
+        encoding = None
+    headers = [(name, value) for name, value in response.headers if name != 'Content-Length']
 
-    college_details = []
-    college_info = {}
+    if not response.is_streamed:
+        body = response.get_data()
+        if encoding:
+            body = compress(body, encoding)
+            response.set_data(body)
+        if len(body) <= response_cache_max_body:
+            responses.put(tag, (body, headers))
+        return response
+
+    # Streamed pages stay streamed; the body is kept once the last chunk has gone out
+    response.response = compress_stream(response.iter_encoded(), encoding,
+                                        on_complete=lambda body: responses.put(tag, (body, headers)),
+                                        max_body=response_cache_max_body)
+    response.headers.pop('Content-Length', None)
+    return response
+
+@views.route('/metrics')
+def metrics():
+    """Prometheus text exposition of stage timings, table sizes and cache counters."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@views.route('/ready')
+def ready():
+    """Readiness: the loading policy, which tables are loaded and how long startup took.
 
-    if os.path.exists(csv_path):
-        try:
-            df = pd.read_csv(csv_path, encoding='utf-8')
-        except UnicodeDecodeError:
-            df = pd.read_csv(csv_path, encoding='cp1252')
-
-        df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
-        
-        # Handle Aliases
-        if 'institute_code' not in df.columns and 'choice_code' in df.columns:
-            df['institute_code'] = df['choice_code']
-        
-        if 'percentile' not in df.columns:
-            if 'merit_marks' in df.columns: df['percentile'] = df['merit_marks']
-            elif 'score' in df.columns: df['percentile'] = df['score']
-            elif 'marks_percentile' in df.columns: df['percentile'] = df['marks_percentile']
-            
-        if 'rank' not in df.columns:
-            if 'merit_no' in df.columns: df['rank'] = df['merit_no']
-            elif 'merit_score' in df.columns: df['rank'] = df['merit_score']
-
-        if 'institute_code' in df.columns and institute_code:
-            df['institute_code'] = df['institute_code'].astype(str).str.replace(r'\.0$', '', regex=True)
-            match = df[df['institute_code'] == str(institute_code)]
-            
-            if not match.empty:
-                college_details = match.to_dict('records')
-                first_row = match.iloc[0]
-                college_info = {
-                    "code": first_row.get('institute_code'),
-                    "name": first_row.get('institute_name', first_row.get('institution_name', 'Unknown')),
-                    "university": first_row.get('university', 'N/A')
-                }
-
-    return render_template('details.html', info=college_info, cutoffs=college_details)
+    200 as soon as the app serves; with ``?warm=1`` 503 until every table
+    is loaded and the background warm-up (if any) has finished.
+    """
+    status = current_app.extensions['cutoff_loader'].status()
+    code = 503 if request.args.get('warm', '') not in ('', '0') and not status['warm'] else 200
+    return jsonify(status), code
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
\ No newline at end of file
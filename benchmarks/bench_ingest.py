@@ -0,0 +1,105 @@
+"""Compare the old apply-based ingest parsers with cutoffs.ingest.
+
+Usage::
+
+    python -m benchmarks.bench_ingest [--rows N] [--repeat N]
+
+Real columns (BCA AI merit strings, polytechnic institute names, MCA MH
+codes) are tiled to ``--rows`` rows so the per-row overhead dominates as
+it does on a full reload. The merit and area pairs are checked to
+produce the same values before they are timed; the code pair is not, as
+the old munging only dropped ".0" and kept apostrophes and zero padding.
+"""
+import argparse
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_materialize import best_of
+from cutoffs.ingest import canonical_codes, extract_area, read_csv, split_merit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def apply_parse_merit(series):
+    # The parse_merit apply normalize_frame used before cutoffs.ingest
+    def parse_merit(val):
+        s = str(val)
+        nums = re.findall(r"[\d\.]+", s)
+        if len(nums) >= 2:
+            return int(nums[0]), float(nums[1])  # Rank, Percentile
+        elif len(nums) == 1:
+            return int(nums[0]), 0.0
+        return 0, 0.0
+
+    parsed_data = series.apply(lambda x: pd.Series(parse_merit(x)))
+    return pd.DataFrame({'rank': parsed_data[0], 'percentile': parsed_data[1]})
+
+
+def apply_split_merit_score(series):
+    # The old script.py's split_merit_score, applied row by row
+    def split_merit_score(value):
+        if pd.isna(value):
+            return pd.Series([None, None])
+        numbers = re.findall(r"\d+\.\d+|\d+", str(value))
+        if len(numbers) >= 2:
+            return pd.Series([int(numbers[0]), float(numbers[1])])
+        elif len(numbers) == 1:
+            return pd.Series([int(numbers[0]), None])
+        return pd.Series([None, None])
+
+    parsed = series.apply(split_merit_score)
+    return pd.DataFrame({'rank': parsed[0], 'percentile': parsed[1]})
+
+
+def apply_area(names):
+    return names.apply(lambda x: str(x).split(',')[-1].strip() if ',' in str(x) else 'Others')
+
+
+def munged_codes(series):
+    # What details() did to the code column on every request
+    return series.astype(str).str.replace(r'\.0$', '', regex=True)
+
+
+def tile(series, n_rows):
+    reps = -(-n_rows // len(series))
+    return pd.Series(np.tile(series.to_numpy(dtype=object), reps)[:n_rows])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    merit = tile(read_csv(os.path.join(BASE_DIR, 'data/bca/ai/cap1.csv'))['All India Merit'], args.rows)
+    names = tile(read_csv(os.path.join(
+        BASE_DIR, 'data/polytechnic/polytechnic_cutoff_data_cap_2.csv'))['institute_name'], args.rows)
+    codes = tile(read_csv(os.path.join(BASE_DIR, 'data/mca/MH/PG_MCA_CAP1_Cuttoff_data.csv'))
+                 ['branch code'], args.rows)
+
+    pairs = (
+        ('merit: parse_merit apply', lambda: apply_parse_merit(merit), lambda: split_merit(merit), True),
+        ('merit: split_merit_score apply', lambda: apply_split_merit_score(merit), lambda: split_merit(merit), True),
+        ('area: split lambda', lambda: apply_area(names), lambda: extract_area(names), True),
+        ('codes: astype/replace', lambda: munged_codes(codes), lambda: canonical_codes(codes), False),
+    )
+
+    print(f"{'parser':<32} {'rows':>8} {'apply':>10} {'vectorized':>11} {'speedup':>8}")
+    for label, old, new, check in pairs:
+        expected, actual = old(), new()
+        if check and isinstance(expected, pd.DataFrame):
+            pd.testing.assert_frame_equal(expected.astype(float), actual, check_names=False)
+        elif check:
+            assert expected.tolist() == actual.tolist(), label
+
+        old_time = best_of(old, args.repeat)
+        new_time = best_of(new, args.repeat)
+        print(f"{label:<32} {args.rows:>8} {old_time * 1000:>8.1f}ms {new_time * 1000:>9.1f}ms "
+              f"{old_time / new_time:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
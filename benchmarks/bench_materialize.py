@@ -0,0 +1,86 @@
+"""Compare the old iterrows card materialization with cutoffs.records.to_records.
+
+Usage::
+
+    python -m benchmarks.bench_materialize [--repeat N]
+
+Runs both implementations over the full (unfiltered) largest CAP tables,
+which is what /colleges materializes when no rank filter is set.
+"""
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from cutoffs.records import to_records
+from cutoffs.store import load_table
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+TABLES = (
+    ('Polytechnic', '', 'data/polytechnic/polytechnic_cutoff_data_cap_2.csv'),
+    ('Polytechnic', '', 'data/polytechnic/polytechnic_cutoff_data_cap_1.csv'),
+    ('MBA', 'MH', 'data/mba/mh/MBA_CAP1_MHCutOff_2023_24 - MBA_CAP1_MHCutOff_2023_24.csv'),
+    ('MCA', 'MH', 'data/mca/MH/PG_MCA_CAP2_Cuttoff_data.csv'),
+)
+
+
+def iterrows_records(temp_df, dept_filter, location_filter):
+    # The per-row loop colleges() used before to_records
+    filtered_doctors = []
+    for _, row in temp_df.iterrows():
+        doc_dict = row.to_dict()
+        for k, v in doc_dict.items():
+            if pd.isna(v):
+                doc_dict[k] = None
+
+        doc_dict.update({
+            "institute_code": row.get('institute_code', 'N/A'),
+            "choice_code": row.get('choice_code', 'N/A'),
+            "name": row.get('institute_name', 'Unknown Institute'),
+            "specialty": row.get('course_name', 'BCA' if dept_filter == 'BCA' else 'MTECH' if dept_filter == 'MTECH' else 'MBA' if dept_filter == 'MBA' else 'MCA' if dept_filter == 'MCA' else 'N/A'),
+            "experience": row.get('percentile', 0),
+            "gender": row.get('quota', location_filter if location_filter else 'N/A'),
+            "qualification": row.get('category', 'N/A'),
+            "consultation_type": row.get('seat_type', 'N/A'),
+            "rank": row.get('rank', 'N/A'),
+            "stage": row.get('stage', 'N/A'),
+            "image": "",
+            "percentile": row.get('percentile', 'N/A'),
+            "merit_score": row.get('rank', 'N/A'),
+            "university": row.get('university', 'N/A'),
+            "status": row.get('status', 'N/A')
+        })
+        filtered_doctors.append(doc_dict)
+    return filtered_doctors
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'table':<55} {'rows':>6} {'iterrows':>10} {'vectorized':>11} {'speedup':>8}")
+    for dept, quota, rel_path in TABLES:
+        csv_path = os.path.join(BASE_DIR, rel_path)
+        if not os.path.exists(csv_path):
+            continue
+        df = load_table(csv_path).df.sort_values(by='percentile', ascending=False)
+
+        old = best_of(lambda: iterrows_records(df, dept, quota), args.repeat)
+        new = best_of(lambda: to_records(df, dept, quota), args.repeat)
+        print(f"{os.path.basename(rel_path)[:55]:<55} {len(df):>6} {old * 1000:>8.1f}ms {new * 1000:>9.1f}ms {old / new:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""Latency, throughput and memory benchmark for the /colleges and /details routes.
+
+Usage::
+
+    python -m benchmarks.bench_routes [--requests N] [--json results.json]
+    python -m benchmarks.bench_routes --url http://127.0.0.1:5000 --concurrency 8
+    python -m benchmarks.bench_routes --compare before.json --json after.json
+
+Every (department, quota, round) combination the routes can resolve is a
+scenario, whether or not a CSV backs it, so the MCA Cuttoff/Cutoff
+spellings and the BCA round fallback of the dataset registry are
+exercised too. Each scenario replays a skewed mix of queries built from
+its own table (branches, categories, rank and percentile quantiles,
+institute codes): landing page, branch, branch + category, rank, rank
+range, percentile, search, autocomplete, the next grid page, the JSON
+API, an all-department eligibility shortlist and /details.
+
+By default the app runs in-process through the Flask test client and the
+peak Python heap of one replay of the mix is measured with tracemalloc.
+With ``--url`` the same mix is sent over HTTP to a running server from
+``--concurrency`` threads and memory is not measured.
+
+In-process, the app's caches are emptied before each scenario and before
+the memory replay, so the warmup requests are the only ones that fill
+them. ``--no-cache`` turns them off, so every timed request filters and
+renders every card through Jinja.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Import the app without its background reload thread
+os.environ.setdefault('CUTOFF_RELOAD_INTERVAL', '0')
+
+import app as webapp  # noqa: E402
+from cutoffs.registry import DEPARTMENTS, QUOTA_DEPARTMENTS, ROUNDS  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _quantiles(column, qs):
+    if column is None or not column.n_valid:
+        return []
+    values = column.sorted[:column.n_valid]
+    return [float(np.quantile(values, q)) for q in qs]
+
+
+def build_queries(department, quota, round_no, table):
+    """Distinct ``(name, url)`` queries for one scenario, most common first."""
+    base = {'department': department, 'round': round_no}
+    if quota:
+        base['gender'] = quota
+
+    def url(path, **params):
+        return f'{path}?{urllib.parse.urlencode(dict(base, **params))}'
+
+    if table is None:
+        return [('landing', url('/colleges')), ('branch', url('/colleges', specialty='Computer Engineering'))]
+
+    courses = table.courses[:3] or ['']
+    counts = table.facet_counts.get('category', {})
+    categories = sorted(counts, key=counts.get, reverse=True)[:2]
+    ranks = _quantiles(table.index.rank, (0.25, 0.5, 0.9))
+    percentiles = _quantiles(table.index.percentile, (0.5,))
+    # MH quota tables only list colleges once a rank range is given
+    needs_range = department in QUOTA_DEPARTMENTS and quota != 'AI'
+    scope = {'min_rank': 1, 'max_rank': int(ranks[1])} if needs_range and ranks else {}
+
+    queries = [
+        ('landing', url('/colleges')),
+        ('branch', url('/colleges', specialty=courses[0], **scope)),
+    ]
+    queries += [('branch', url('/colleges', specialty=course, **scope)) for course in courses[1:]]
+    queries += [('branch+category', url('/colleges', specialty=courses[0], category=c, **scope))
+                for c in categories]
+    if ranks:
+        queries.append(('rank', url('/colleges', specialty=courses[0], rank=int(ranks[0]), **scope)))
+        queries.append(('rank-range', url('/colleges', specialty=courses[0], min_rank=int(ranks[0]),
+                                          max_rank=int(ranks[2]))))
+    if percentiles:
+        queries.append(('percentile', url('/colleges', specialty=courses[0],
+                                          experience=round(percentiles[0], 2), **scope)))
+    if 'institute_name' in table.df.columns and len(table):
+        word = str(table.df['institute_name'].iloc[0]).split()[0].lower()
+        queries.append(('search', url('/colleges', specialty=courses[0], search=word, **scope)))
+        queries.append(('suggest', url('/api/institutes/suggest', q=word[:4])))
+    queries.append(('grid-page-2', url('/colleges/grid', specialty=courses[0], page=2, **scope)))
+    queries.append(('api', url('/api/colleges', specialty=courses[0], **scope)))
+    if ranks:
+        queries.append(('eligibility', url('/api/eligibility', rank=int(ranks[1]))))
+    if 'institute_code' in table.df.columns and len(table):
+        codes = pd.unique(table.df['institute_code'].dropna())[:3]
+        queries += [('details', url('/details', code=code)) for code in codes]
+    return queries
+
+
+def scenarios(store):
+    for department in DEPARTMENTS:
+        quotas = ('AI', 'MH') if department in QUOTA_DEPARTMENTS else ('',)
+        for quota in quotas:
+            for round_no in ROUNDS:
+                table = store.get(department, quota, round_no)
+                name = '/'.join(part for part in (department, quota, f'cap{round_no}') if part)
+                yield {
+                    'name': name,
+                    'department': department,
+                    'quota': quota,
+                    'round': round_no,
+                    'csv': os.path.relpath(table.path, BASE_DIR) if table is not None else None,
+                    'rows': len(table) if table is not None else 0,
+                    'queries': build_queries(department, quota, round_no, table),
+                }
+
+
+def request_mix(queries, n_requests, rng):
+    """``n_requests`` URLs drawn with a Zipf-like skew toward the first queries."""
+    weights = [1 / (i + 1) for i in range(len(queries))]
+    return [url for _, url in rng.choices(queries, weights=weights, k=n_requests)]
+
+
+def run_in_process(client, urls):
+    latencies, errors = [], 0
+    started = time.perf_counter()
+    for url in urls:
+        t0 = time.perf_counter()
+        response = client.get(url)
+        response.get_data()
+        latencies.append(time.perf_counter() - t0)
+        errors += response.status_code >= 400
+    return latencies, errors, time.perf_counter() - started
+
+
+def clear_caches():
+    """Forget cached query results, response bodies and card HTML, so the next request does the full work."""
+    webapp.results.clear()
+    webapp.responses.clear()
+    webapp.fragments.clear()
+
+
+def peak_memory(client, urls):
+    """Peak Python heap (bytes) while serving each distinct URL once, from cold caches."""
+    clear_caches()
+    tracemalloc.start()
+    try:
+        for url in dict.fromkeys(urls):
+            client.get(url).get_data()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_http(base_url, urls, concurrency, timeout):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def fetch(url):
+        nonlocal errors
+        t0 = time.perf_counter()
+        try:
+            with urllib.request.urlopen(base_url + url, timeout=timeout) as response:
+                response.read()
+            failed = False
+        except (urllib.error.URLError, OSError):
+            failed = True
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            errors += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, urls))
+    return latencies, errors, time.perf_counter() - started
+
+
+def summarize(latencies, errors, wall):
+    ms = np.asarray(latencies) * 1000
+    return {
+        'requests': len(latencies),
+        'errors': int(errors),
+        'mean_ms': round(float(ms.mean()), 3) if len(ms) else None,
+        'p50_ms': round(float(np.percentile(ms, 50)), 3) if len(ms) else None,
+        'p95_ms': round(float(np.percentile(ms, 95)), 3) if len(ms) else None,
+        'p99_ms': round(float(np.percentile(ms, 99)), 3) if len(ms) else None,
+        'throughput_rps': round(len(ms) / wall, 2) if wall else None,
+    }
+
+
+def compare(baseline_path, results):
+    with open(baseline_path, encoding='utf-8') as fh:
+        baseline = {s['name']: s for s in json.load(fh)['scenarios']}
+    print(f"\n{'scenario':<18} {'p95 before':>11} {'p95 after':>10} {'change':>8}")
+    for scenario in results['scenarios']:
+        before = baseline.get(scenario['name'], {}).get('p95_ms')
+        after = scenario['p95_ms']
+        if before and after:
+            print(f"{scenario['name']:<18} {before:>9.2f}ms {after:>8.2f}ms {after / before - 1:>+7.0%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=5, help='untimed requests per scenario')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--only', help='run scenarios whose name contains this text')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='disable the query result, response body and card caches')
+    parser.add_argument('--url', help='benchmark a running server over HTTP instead')
+    parser.add_argument('--concurrency', type=int, default=4, help='HTTP client threads')
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='print p95 changes against an earlier --json file')
+    args = parser.parse_args(argv)
+
+    if args.no_cache:
+        # A cache with no room stores nothing, so every request filters and renders
+        webapp.results.max_entries = 0
+        webapp.responses.max_entries = 0
+        webapp.fragments.max_entries = 0
+    rng = random.Random(args.seed)
+    client = webapp.app.test_client()
+    results = {
+        'mode': 'http' if args.url else 'in-process',
+        'url': args.url,
+        'concurrency': args.concurrency if args.url else 1,
+        'requests_per_scenario': args.requests,
+        'result_cache': not args.no_cache,
+        'response_cache': not args.no_cache,
+        'card_cache': not args.no_cache,
+        'started_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'scenarios': [],
+    }
+
+    print(f"{'scenario':<18} {'rows':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'peak mem':>9}  csv")
+    for scenario in scenarios(webapp.store):
+        if args.only and args.only not in scenario['name']:
+            continue
+        queries = scenario.pop('queries')
+        urls = request_mix(queries, args.requests, rng)
+        clear_caches()
+
+        if args.url:
+            run_http(args.url, urls[:args.warmup], args.concurrency, args.timeout)
+            stats = summarize(*run_http(args.url, urls, args.concurrency, args.timeout))
+            stats['peak_mem_bytes'] = None
+        else:
+            run_in_process(client, urls[:args.warmup])
+            stats = summarize(*run_in_process(client, urls))
+            stats['peak_mem_bytes'] = peak_memory(client, urls)
+            stats['cache_hit_ratio'] = webapp.results.stats()['hit_ratio']
+        scenario.update(stats, queries=len(queries))
+        results['scenarios'].append(scenario)
+
+        mem = f"{stats['peak_mem_bytes'] / 2**20:.1f}MB" if stats['peak_mem_bytes'] is not None else '-'
+        print(f"{scenario['name']:<18} {scenario['rows']:>6} {stats['p50_ms']:>7.2f}ms {stats['p95_ms']:>7.2f}ms "
+              f"{stats['p99_ms']:>7.2f}ms {stats['throughput_rps']:>8.1f} {mem:>9}  {scenario['csv'] or 'missing'}")
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['max_rss_bytes'] = maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=1)
+        print(f"\nWrote {args.json}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
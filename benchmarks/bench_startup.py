@@ -0,0 +1,111 @@
+"""Startup time per loading policy: how soon a fresh process serves, and how soon it is warm.
+
+Usage::
+
+    python -m benchmarks.bench_startup [--policy eager|lazy|background|all] [--repeat N] [--json results.json]
+
+Every run is a fresh interpreter, as a new (autoscaled) worker would be.
+It imports the app, calls ``create_app`` with the policy, asks /ready,
+then sends one API request per department and, for ``background``, waits
+for the warm-up thread. Reported are the seconds from spawning the
+process to each of those points (median of ``--repeat`` runs) and the
+latency of each department's first request, which is where ``lazy`` pays
+for the tables it did not load up front.
+
+Run ``python -m cutoffs.compile`` first to time the memory-mapped tables
+rather than CSV parsing.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from cutoffs.warmup import POLICIES
+
+# One table per department; MTech needs an explicit round
+FIRST_REQUESTS = (
+    ('MCA', '/api/colleges?department=MCA&gender=AI&round=1&per_page=50'),
+    ('MBA', '/api/colleges?department=MBA&gender=MH&round=1&per_page=50'),
+    ('BCA', '/api/colleges?department=BCA&gender=AI&round=1&per_page=50'),
+    ('MTECH', '/api/colleges?department=MTECH&round=1&per_page=50'),
+    ('Polytechnic', '/api/colleges?department=Polytechnic&round=1&per_page=50'),
+)
+
+SPAWNED_ENV = 'BENCH_STARTUP_SPAWNED'
+
+
+def child(policy):
+    """One startup, timed from the parent's spawn; prints the marks as JSON."""
+    spawned = float(os.environ[SPAWNED_ENV])
+    marks = {}
+
+    import app as webapp
+
+    marks['import'] = time.time() - spawned
+    flask_app = webapp.create_app(policy)
+    marks['create_app'] = time.time() - spawned
+    client = flask_app.test_client()
+    if client.get('/ready').status_code != 200:
+        raise SystemExit('/ready did not answer 200')
+    marks['ready'] = time.time() - spawned
+
+    for department, url in FIRST_REQUESTS:
+        started = time.perf_counter()
+        client.get(url)
+        marks[f'first {department}'] = time.perf_counter() - started
+    marks['all departments'] = time.time() - spawned
+
+    flask_app.extensions['cutoff_loader'].wait()
+    status = client.get('/ready').get_json()
+    marks['warm'] = time.time() - spawned if status['warm'] else None
+    json.dump(marks, sys.stdout)
+
+
+def run(policy, repeat):
+    env = dict(os.environ, CUTOFF_RELOAD_INTERVAL='0', LOG_LEVEL='WARNING')
+    runs = []
+    for _ in range(repeat):
+        env[SPAWNED_ENV] = repr(time.time())
+        out = subprocess.run([sys.executable, '-m', 'benchmarks.bench_startup', '--child', policy],
+                             env=env, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out))
+    medians = {}
+    for mark in runs[0]:
+        values = [r[mark] for r in runs if r[mark] is not None]
+        medians[mark] = statistics.median(values) if values else None
+    return {'runs': runs, 'median': medians}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--policy', choices=POLICIES + ('all',), default='all')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help='write every run and the medians to this file')
+    parser.add_argument('--child', choices=POLICIES, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child(args.child)
+        return
+
+    policies = POLICIES if args.policy == 'all' else (args.policy,)
+    results = {policy: run(policy, args.repeat) for policy in policies}
+
+    marks = list(results[policies[0]]['median'])
+    print(f"{'seconds':<18}" + ''.join(f'{policy:>12}' for policy in policies))
+    for mark in marks:
+        cells = [results[policy]['median'][mark] for policy in policies]
+        print(f'{mark:<18}' + ''.join(f'{"-":>12}' if cell is None else f'{cell:>12.3f}' for cell in cells))
+    print("(first <department>: latency of that request; every other row: seconds since spawn)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=1)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
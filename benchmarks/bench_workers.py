@@ -0,0 +1,113 @@
+"""Per-worker unique vs shared memory with and without a preloading master.
+
+Usage::
+
+    python -m benchmarks.bench_workers [--workers N] [--requests N] [--mode preload|independent|both]
+                                       [--json results.json]
+
+Forks ``--workers`` processes the way gunicorn does (Linux only). With
+``preload`` the parent loads the app, builds the derived indexes and
+freezes the collector before forking, as ``gunicorn.conf.py`` does; with
+``independent`` every worker imports and loads the app itself. Each
+worker then serves ``--requests`` requests from the bench_routes query
+mix so it touches every table, and reports its memory from
+``/proc/<pid>/smaps_rollup`` (see :mod:`cutoffs.memory`).
+
+Run ``python -m cutoffs.compile`` first to measure the memory-mapped
+columnar tables rather than parsed CSVs.
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+
+# Import the app without its background reload thread
+os.environ.setdefault('CUTOFF_RELOAD_INTERVAL', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+
+def serve(n_requests, seed):
+    """Replay the query mix of every scenario in this process."""
+    from benchmarks import bench_routes
+
+    rng = random.Random(seed)
+    client = bench_routes.webapp.app.test_client()
+    for scenario in bench_routes.scenarios(bench_routes.webapp.store):
+        bench_routes.run_in_process(client, bench_routes.request_mix(scenario['queries'], n_requests, rng))
+
+
+def run(mode, n_workers, n_requests):
+    from cutoffs.memory import process_memory
+
+    if mode == 'preload':
+        import app
+
+        app.preload()
+        gc.freeze()
+
+    workers = []
+    for i in range(n_workers):
+        ready_r, ready_w = os.pipe()
+        exit_r, exit_w = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(ready_r)
+            os.close(exit_w)
+            code = 0
+            try:
+                serve(n_requests, seed=i)
+            except Exception as e:
+                print(f"worker {i} failed: {e!r}", file=sys.stderr)
+                code = 1
+            os.write(ready_w, b'1')
+            # Stay alive (and resident) until the parent has measured every worker
+            os.read(exit_r, 1)
+            os._exit(code)
+        os.close(ready_w)
+        os.close(exit_r)
+        workers.append((pid, ready_r, exit_w))
+
+    for _, ready_r, _ in workers:
+        os.read(ready_r, 1)
+    report = [dict(process_memory(), pid=os.getpid(), role='master')]
+    report += [dict(process_memory(pid), pid=pid, role='worker') for pid, _, _ in workers]
+
+    failed = 0
+    for pid, ready_r, exit_w in workers:
+        os.write(exit_w, b'1')
+        os.close(exit_w)
+        os.close(ready_r)
+        _, status = os.waitpid(pid, 0)
+        failed += os.waitstatus_to_exitcode(status) != 0
+    if failed:
+        raise SystemExit(f"{failed} workers failed")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=20, help='requests per scenario per worker')
+    parser.add_argument('--mode', choices=('preload', 'independent', 'both'), default='both')
+    parser.add_argument('--json', help='write the reports to this file')
+    args = parser.parse_args(argv)
+
+    from cutoffs.memory import format_report
+
+    # Independent first: its parent never imports the app, so preload still starts clean
+    modes = ('independent', 'preload') if args.mode == 'both' else (args.mode,)
+    results = {}
+    for mode in modes:
+        results[mode] = run(mode, args.workers, args.requests)
+        print(f"\n{mode}:\n{format_report(results[mode])}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=1)
+        print(f"\nWrote {args.json}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+from .cache import ResultCache
+from .registry import Dataset, discover, table_key
+from .store import CutoffStore, CutoffTable, load_table
+
+__all__ = ['CutoffStore', 'CutoffTable', 'Dataset', 'ResultCache', 'discover', 'load_table', 'table_key']
@@ -0,0 +1,253 @@
+"""Eligibility shortlists for a whole roster of student profiles.
+
+Usage::
+
+    python -m cutoffs.batch profiles.csv [--output results.jsonl] [--format jsonl|csv]
+                                         [--limit N] [--workers N]
+
+Profiles are CSV or JSON rows with the /api/eligibility fields (rank,
+percentile, category, quota, departments, courses) and an optional ``id``.
+Students sharing the same filters share one set of candidate lines, kept
+sorted by their best closing rank and best closing percentile over the
+rounds; each student's eligible lines are then a ``searchsorted``
+boundary into those arrays instead of a scan. Results stream out per student, in input order.
+Large rosters are split into chunks evaluated by a process pool.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .eligibility import DEFAULT_LIMIT, EligibilityIndex, parse_profile
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Profiles per unit of work, and the roster size from which a pool pays off
+CHUNK_SIZE = 256
+POOL_THRESHOLD = 2000
+
+ID_COLUMNS = ('id', 'student_id', 'roll_no', 'name')
+# A roster CSV needs at least one of the columns parse_profile reads the student's numbers from
+NUMBER_COLUMNS = ('rank', 'percentile', 'merit_score', 'marks', 'experience')
+
+CSV_FIELDS = ('id', 'total', 'department', 'quota_group', 'institute_code', 'institute_name', 'choice_code',
+              'course_name', 'category', 'quota', 'seat_type', 'year', 'last_round', 'rounds', 'rank',
+              'percentile')
+
+
+def read_profiles(source, fmt=None):
+    """``(id, profile)`` pairs from a CSV or JSON path, file object or text.
+
+    JSON may be a list of objects, ``{"profiles": [...]}`` or JSON Lines.
+    Rows without an id column are numbered from 1. Without ``fmt`` the
+    format is sniffed from the text. Raises ``ValueError`` for text that is
+    not a roster in that format.
+    """
+    if hasattr(source, 'read'):
+        text = source.read()
+    elif isinstance(source, str) and os.path.exists(source):
+        fmt = fmt or ('csv' if source.lower().endswith('.csv') else 'json')
+        with open(source, encoding='utf-8-sig') as f:
+            text = f.read()
+    else:
+        text = source
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    fmt = fmt or ('json' if text.lstrip()[:1] in ('[', '{') else 'csv')
+
+    if fmt == 'csv':
+        df = pd.read_csv(io.StringIO(text), dtype=str, keep_default_na=False)
+        if set(NUMBER_COLUMNS).isdisjoint(str(column).strip().lower() for column in df.columns):
+            raise ValueError(f"no {' or '.join(NUMBER_COLUMNS[:2])} column")
+        rows = df.to_dict('records')
+    else:
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError:
+            if not text.strip():
+                raise ValueError("no profiles") from None
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(rows, dict):
+            rows = rows.get('profiles', [rows])
+        if not isinstance(rows, list):
+            raise ValueError("expected a list of profiles")
+
+    profiles = []
+    for number, row in enumerate(rows, 1):
+        if not isinstance(row, dict):
+            raise ValueError(f"profile {number} is not an object")
+        row = {str(key).strip().lower(): value for key, value in row.items()}
+        student = next((row[c] for c in ID_COLUMNS if row.get(c) not in (None, '')), number)
+        try:
+            profiles.append((student, parse_profile(row)))
+        except ValueError as e:
+            raise ValueError(f"profile {number}: {e}") from None
+    return profiles
+
+
+def filter_key(profile):
+    return (tuple(profile['departments']), profile['quota'],
+            tuple(profile['categories']), tuple(profile['courses']))
+
+
+class SortedLines:
+    """A filter group's candidate lines sorted by their best closing rank and percentile.
+
+    A line is attainable in some round with a given rank only if its
+    highest closing rank over the rounds is >= that rank, and with given
+    marks only if its lowest closing percentile is <= the marks. Sorted by
+    those, the lines a student can get into are a suffix (rank) and a
+    prefix (percentile) found with ``searchsorted``.
+    """
+
+    def __init__(self, index, rows):
+        self.rows = rows
+        self.ranks = index.ranks[rows]
+        self.percentiles = index.percentiles[rows]
+        with warnings.catch_warnings():
+            # All-NaN lines (no cutoff in any round) are dropped by _sorted
+            warnings.simplefilter('ignore', RuntimeWarning)
+            self.by_rank = self._sorted(np.nanmax(self.ranks, axis=1))
+            self.by_percentile = self._sorted(np.nanmin(self.percentiles, axis=1))
+
+    @staticmethod
+    def _sorted(values):
+        positions = np.flatnonzero(~np.isnan(values))
+        order = np.argsort(values[positions], kind='stable')
+        return positions[order], values[positions][order]
+
+    def join(self, ranks, percentiles):
+        """``(rows, ok)`` per student, as :meth:`EligibilityIndex.eligible` computes them.
+
+        ``ranks``/``percentiles`` hold one value per student (NaN when not
+        given). The boundaries for the whole group are two
+        ``searchsorted`` calls; each student then only checks the rounds
+        of the lines inside them (the shorter side when both are given),
+        so the work follows the lines they can get into rather than the
+        group's size. Rows come out in ``searchsorted`` order, not sorted.
+        """
+        starts = np.searchsorted(self.by_rank[1], ranks, side='left')
+        ends = np.searchsorted(self.by_percentile[1], percentiles, side='right')
+        for s in range(len(ranks)):
+            has_rank, has_percentile = not np.isnan(ranks[s]), not np.isnan(percentiles[s])
+            by_rank = self.by_rank[0][starts[s]:]
+            by_percentile = self.by_percentile[0][:ends[s]]
+            if has_rank and has_percentile:
+                positions = by_rank if len(by_rank) <= len(by_percentile) else by_percentile
+            else:
+                positions = by_rank if has_rank else by_percentile
+
+            with np.errstate(invalid='ignore'):
+                if has_rank and has_percentile:
+                    ok = (self.ranks[positions] >= ranks[s]) & (self.percentiles[positions] <= percentiles[s])
+                    attainable = ok.any(axis=1)
+                    positions, ok = positions[attainable], ok[attainable]
+                elif has_rank:
+                    ok = self.ranks[positions] >= ranks[s]
+                else:
+                    ok = self.percentiles[positions] <= percentiles[s]
+            yield self.rows[positions], ok
+
+
+def evaluate_chunk(index, profiles, limit=DEFAULT_LIMIT, groups=None):
+    """Result dicts for a list of ``(id, profile)`` pairs, in the same order."""
+    groups = {} if groups is None else groups
+    by_key = {}
+    for position, (_, profile) in enumerate(profiles):
+        if profile['rank'] is not None or profile['percentile'] is not None:
+            by_key.setdefault(filter_key(profile), []).append(position)
+
+    shortlists = [(0, [])] * len(profiles)
+    for key, positions in by_key.items():
+        if key not in groups:
+            groups[key] = SortedLines(index, np.flatnonzero(index.candidate_rows(profiles[positions[0]][1])))
+        ranks = np.array([profiles[p][1]['rank'] for p in positions], dtype=np.float64)
+        percentiles = np.array([profiles[p][1]['percentile'] for p in positions], dtype=np.float64)
+        for position, (rows, ok) in zip(positions, groups[key].join(ranks, percentiles)):
+            shortlists[position] = index.options(rows, ok, limit)
+
+    return [{'id': student, 'profile': profile, 'total': total, 'options': options}
+            for (student, profile), (total, options) in zip(profiles, shortlists)]
+
+
+_worker_index = None
+
+
+def _init_worker(index):
+    global _worker_index
+    _worker_index = index
+
+
+def _evaluate_in_worker(args):
+    profiles, limit = args
+    return evaluate_chunk(_worker_index, profiles, limit)
+
+
+def evaluate(index, profiles, limit=DEFAULT_LIMIT, workers=0, chunk_size=CHUNK_SIZE):
+    """Yield one result dict per profile, in input order.
+
+    With ``workers`` > 1 and at least ``POOL_THRESHOLD`` profiles the
+    chunks are evaluated by a process pool; each worker receives the
+    index once.
+    """
+    chunks = [profiles[i:i + chunk_size] for i in range(0, len(profiles), chunk_size)]
+    if workers > 1 and len(profiles) >= POOL_THRESHOLD:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(index,)) as pool:
+            for results in pool.map(_evaluate_in_worker, [(chunk, limit) for chunk in chunks]):
+                yield from results
+        return
+    groups = {}
+    for chunk in chunks:
+        yield from evaluate_chunk(index, chunk, limit, groups)
+
+
+def write_csv(results, out):
+    """One row per (student, option); students without options get one row of blanks."""
+    writer = csv.DictWriter(out, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for result in results:
+        for option in result['options'] or [{}]:
+            row = dict(option, id=result['id'], total=result['total'])
+            row['rounds'] = ' '.join(option.get('rounds') or [])
+            writer.writerow(row)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('profiles', help="CSV or JSON file of student profiles")
+    parser.add_argument('--output', default=None, help="output file (default: stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl')
+    parser.add_argument('--limit', type=int, default=DEFAULT_LIMIT, help="options per student")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help=f"process pool size for rosters of {POOL_THRESHOLD}+ profiles (0 disables)")
+    parser.add_argument('--base-dir', default=BASE_DIR, help="directory containing data/")
+    args = parser.parse_args(argv)
+
+    from .history import CutoffHistory
+    from .store import CutoffStore
+
+    profiles = read_profiles(args.profiles)
+    index = EligibilityIndex(CutoffHistory(CutoffStore(args.base_dir).load()).tables())
+    results = evaluate(index, profiles, args.limit, args.workers)
+
+    out = open(args.output, 'w', newline='', encoding='utf-8') if args.output else sys.stdout
+    try:
+        if args.format == 'csv':
+            write_csv(results, out)
+        else:
+            for result in results:
+                out.write(json.dumps(result) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+def estimate_size(value):
+    """Rough size in bytes of a cached result.
+
+    Lists of dicts (cards, rows) are sized from their first element, which
+    is close enough for eviction since every row has the same fields.
+    """
+    if isinstance(value, tuple):
+        return sum(estimate_size(item) for item in value)
+    if isinstance(value, list):
+        if not value:
+            return sys.getsizeof(value)
+        return sys.getsizeof(value) + len(value) * estimate_size(value[0])
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sys.getsizeof(k) + estimate_size(v) for k, v in value.items())
+    nbytes = getattr(value, 'nbytes', None)
+    if nbytes is not None:
+        return int(nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU cache of query results with a TTL and a byte budget.
+
+    Entries are evicted least recently used first once either
+    ``max_entries`` or ``max_bytes`` is exceeded, and expire ``ttl``
+    seconds after they were stored (``ttl=0`` keeps them until evicted).
+    Callers put the data version in the key and :meth:`clear` the cache
+    when tables reload, so a hit is always current.
+    """
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=300):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # label -> [hits, misses], for lookups made with a label (e.g. per table)
+        self.by_label = {}
+
+    def get(self, key):
+        """Return the cached value for ``key``, or ``MISSING``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, size, expires = entry
+                if not expires or expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                self._drop(key)
+            self.misses += 1
+            return MISSING
+
+    def put(self, key, value, size=None):
+        size = estimate_size(value) if size is None else size
+        if not self.max_entries or size > self.max_bytes:
+            return
+        expires = time.monotonic() + self.ttl if self.ttl else 0
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, expires)
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, label=None):
+        value = self.get(key)
+        if label is not None:
+            with self._lock:
+                counts = self.by_label.setdefault(label, [0, 0])
+                counts[value is MISSING] += 1
+        if value is MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _drop(self, key):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+
+    def clear(self, *_):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_entries': self.max_entries,
+            'max_bytes': self.max_bytes,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_ratio': self.hits / lookups if lookups else None,
+            'by_label': {label: {'hits': hits, 'misses': misses, 'hit_ratio': hits / (hits + misses)}
+                         for label, (hits, misses) in list(self.by_label.items())},
+        }
@@ -0,0 +1,133 @@
+"""Compiled, memory-mappable form of the normalized cutoff tables.
+
+Each table is a directory holding ``meta.json`` and one ``.npy`` file per
+column:
+
+* ``rank`` is stored as the integer type :func:`cutoffs.compact.compact_column`
+  picks for it (int16 for most tables), with a separate null mask when
+  needed, and read back as the matching nullable ``Int`` type when it has
+  one,
+* other numeric columns keep their compacted dtype (see
+  :mod:`cutoffs.compact`; percentile is float64),
+* every string column is dictionary encoded: the sorted distinct values
+  live in ``meta.json`` and the column file holds the smallest signed int
+  codes (``-1`` for missing).
+
+Files are opened with ``mmap_mode='r'`` so worker processes share the page
+cache instead of each holding a private parsed copy.
+"""
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from .compact import compact_column
+
+# 3: rows failing cutoffs.schema validation are left out
+# 4: rank in its compact integer type rather than always int32
+FORMAT_VERSION = 4
+META_FILE = 'meta.json'
+
+
+def compiled_path(compiled_dir, data_dir, csv_path):
+    """Directory that holds the compiled form of ``csv_path``."""
+    rel = os.path.relpath(csv_path, data_dir)
+    return os.path.join(compiled_dir, os.path.splitext(rel)[0])
+
+
+def _code_dtype(n_values):
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_values < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def _encode_column(name, series):
+    """Return ``(meta, arrays)`` where arrays maps a file suffix to an ndarray."""
+    if name == 'rank' and pd.api.types.is_numeric_dtype(series):
+        # The same integer type a table parsed from CSV gets, so both take the same memory
+        series = compact_column(name, series)
+        if pd.api.types.is_integer_dtype(series.dtype):
+            missing = series.isna().to_numpy()
+            dtype = getattr(series.dtype, 'numpy_dtype', series.dtype)
+            arrays = {'': series.to_numpy(dtype=dtype, na_value=0) if missing.any() else series.to_numpy(dtype=dtype)}
+            if missing.any():
+                arrays['.mask'] = missing
+            return {'kind': 'int', 'nullable': bool(missing.any())}, arrays
+
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return {'kind': 'numeric'}, {'': series.to_numpy()}
+
+    present = series.notna()
+    values = series[present].astype(str)
+    categories = sorted(values.unique().tolist())
+    codes = np.full(len(series), -1, dtype=_code_dtype(len(categories)))
+    codes[present.to_numpy()] = pd.Categorical(values, categories=categories).codes
+    return {'kind': 'dict', 'categories': categories}, {'': codes}
+
+
+def write_frame(df, out_dir, source=None, validation=None):
+    """Write ``df`` to ``out_dir``, replacing any previous build atomically.
+
+    ``source`` and ``validation`` are kept in ``meta.json`` as given.
+    """
+    tmp_dir = out_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        meta, arrays = _encode_column(name, df[name])
+        meta['name'] = name
+        meta['file'] = f'col{i}'
+        for suffix, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'col{i}{suffix}.npy'), array, allow_pickle=False)
+        columns.append(meta)
+
+    with open(os.path.join(tmp_dir, META_FILE), 'w', encoding='utf-8') as fh:
+        json.dump({
+            'format_version': FORMAT_VERSION,
+            'rows': len(df),
+            'source': source or {},
+            'validation': validation or {},
+            'columns': columns,
+        }, fh, ensure_ascii=False, indent=1)
+
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+
+
+def read_meta(out_dir):
+    try:
+        with open(os.path.join(out_dir, META_FILE), encoding='utf-8') as fh:
+            meta = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if meta.get('format_version') != FORMAT_VERSION:
+        return None
+    return meta
+
+
+def read_frame(out_dir, meta=None, mmap=True):
+    """Load a compiled table. Column data stays memory-mapped where possible."""
+    meta = meta or read_meta(out_dir)
+    mmap_mode = 'r' if mmap else None
+
+    def load(name):
+        return np.load(os.path.join(out_dir, name + '.npy'), mmap_mode=mmap_mode, allow_pickle=False)
+
+    data = {}
+    for column in meta['columns']:
+        values = load(column['file'])
+        if column['kind'] == 'dict':
+            dtype = pd.CategoricalDtype(column['categories'])
+            data[column['name']] = pd.Categorical.from_codes(values, dtype=dtype, validate=False)
+        elif column['kind'] == 'int' and column.get('nullable'):
+            # Nullable integers over the mapped values, as compact_frame builds them from CSV
+            mask = np.array(load(column['file'] + '.mask'), dtype=bool)
+            data[column['name']] = pd.arrays.IntegerArray(np.asarray(values), mask)
+        else:
+            data[column['name']] = values
+    return pd.DataFrame(data, columns=[c['name'] for c in meta['columns']], copy=False)
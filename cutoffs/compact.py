@@ -0,0 +1,80 @@
+"""Compact in-memory dtypes for normalized cutoff tables.
+
+``pd.read_csv`` leaves every text column as Python ``object``: one string
+object per cell, so an institute name repeated on hundreds of rows is
+stored hundreds of times. :func:`compact_frame` turns text columns into
+categoricals (one copy of each distinct value plus small integer codes,
+which is also what the posting-list indexes are built from), integral
+ranks into the smallest integer type that holds them (pandas' nullable
+``Int`` types where a rank is missing) and other integer columns into the
+smallest signed type. Compiled tables store the same types
+(:mod:`cutoffs.columnar` encodes ``rank`` with :func:`compact_column`),
+so a table takes the same memory however it was loaded.
+
+Percentiles stay ``float64``: they carry up to seven decimals
+(``99.8943436``), which ``float32`` cannot hold, and a rounded cutoff
+would flip ``cutoff <= marks`` comparisons at the boundary.
+
+``python -m cutoffs.footprint`` reports what this saves per table and
+column.
+"""
+import numpy as np
+import pandas as pd
+
+# Integral float columns that become (nullable) integers
+INTEGER_COLUMNS = ('rank',)
+
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+
+
+def _int_dtype(low, high):
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return dtype
+    return np.int64
+
+
+def _compact_integers(values):
+    """``values`` (float64 with NaN, or an integer array) as the smallest fitting integers."""
+    missing = np.isnan(values) if values.dtype.kind == 'f' else np.zeros(len(values), dtype=bool)
+    present = values[~missing]
+    if not len(present):
+        return None
+    dtype = _int_dtype(present.min(), present.max())
+    if not missing.any():
+        return values.astype(dtype)
+    # Nullable integers: missing ranks read as <NA> instead of forcing the column to float
+    return pd.arrays.IntegerArray(np.where(missing, 0, values).astype(dtype), missing)
+
+
+def compact_column(name, series):
+    """``series`` in its compact dtype, or unchanged when there is nothing to gain."""
+    dtype = series.dtype
+    if isinstance(dtype, pd.CategoricalDtype) or pd.api.types.is_bool_dtype(dtype):
+        return series
+
+    if pd.api.types.is_integer_dtype(dtype) and not pd.api.types.is_extension_array_dtype(dtype):
+        values = _compact_integers(series.to_numpy())
+        return series if values is None else pd.Series(values, index=series.index, name=series.name)
+
+    if name in INTEGER_COLUMNS and pd.api.types.is_float_dtype(dtype):
+        values = series.to_numpy(dtype=np.float64)
+        present = values[~np.isnan(values)]
+        if len(present) and np.all(np.mod(present, 1) == 0):
+            return pd.Series(_compact_integers(values), index=series.index, name=series.name)
+        return series
+
+    if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+        present = series.dropna()
+        # Mixed numbers and text keep their types; sorting them would fail anyway
+        if len(present) and all(isinstance(value, str) for value in present.unique()):
+            return series.astype('category')
+    return series
+
+
+def compact_frame(df):
+    """Compact every column of a normalized frame in place and return it."""
+    for position, name in enumerate(df.columns):
+        df.isetitem(position, compact_column(name, df.iloc[:, position]))
+    return df
@@ -0,0 +1,193 @@
+"""Ingest every cutoff CSV under data/: validate it and compile it into the columnar format.
+
+Usage::
+
+    python -m cutoffs.compile [--force] [--workers N] [--base-dir DIR] [--out DIR]
+
+This replaces the old ``script.py`` cleaning script. Which files count is
+up to the dataset registry (:func:`cutoffs.registry.scan`): backups and
+copies such as ``cap1_backup.csv``, and second files for the same
+department, quota, round and year, are left out and listed as ignored.
+
+Every other CSV is normalized and checked against the canonical schema
+(:mod:`cutoffs.schema`). A file missing a required column is not
+compiled. Rejected rows are left out of the table and written, with
+their CSV line and reason, to ``<out>/rejects/<csv path>``. Files with
+the same contents as another dataset are flagged; usually one of them was
+saved under the wrong name.
+
+Only CSVs changed since the last build are compiled: same size and mtime
+as the build, or the same content hash, means up to date. The changed ones
+are compiled in parallel by a process pool, so re-ingesting an unchanged
+tree takes well under a second. ``<out>/manifest.json`` lists every
+dataset with its hash, rows, rejects and status, plus the ignored files.
+The app picks the compiled tables up on its next (re)load. Exits non-zero
+if any file could not be compiled.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .compact import compact_frame
+from .columnar import FORMAT_VERSION, compiled_path, read_meta, write_frame
+from .ingest import read_csv
+from .normalize import normalize_frame
+from .registry import scan
+from .schema import check_columns, validate_frame
+from .store import file_digest
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MANIFEST_FILE = 'manifest.json'
+REJECTS_DIR = 'rejects'
+
+
+def rejects_path(compiled_dir, data_dir, csv_path):
+    return os.path.join(compiled_dir, REJECTS_DIR, os.path.relpath(csv_path, data_dir))
+
+
+def compile_table(csv_path, out_dir, rejects_file, source):
+    """Normalize, validate and write one CSV. Returns its manifest fields."""
+    df = normalize_frame(read_csv(csv_path))
+    errors, warnings = check_columns(df)
+    if errors:
+        return {'status': 'invalid', 'rows': 0, 'rejected': 0, 'errors': errors, 'warnings': warnings}
+
+    df, rejects = validate_frame(df)
+    if len(rejects):
+        os.makedirs(os.path.dirname(rejects_file), exist_ok=True)
+        rejects.to_csv(rejects_file, index=False)
+    elif os.path.exists(rejects_file):
+        os.remove(rejects_file)
+    validation = {'rejected': len(rejects), 'warnings': warnings}
+    write_frame(compact_frame(df), out_dir, source=source, validation=validation)
+    return {'status': 'compiled', 'rows': len(df), 'rejected': len(rejects), 'errors': [], 'warnings': warnings}
+
+
+def _compile_in_worker(args):
+    # One broken file must not take the rest of the pool down with it
+    try:
+        return compile_table(*args)
+    except Exception as e:
+        return {'status': 'failed', 'rows': 0, 'rejected': 0, 'errors': [repr(e)], 'warnings': []}
+
+
+def ingest(base_dir=BASE_DIR, compiled_dir=None, force=False, workers=0):
+    """Compile the changed CSVs under ``base_dir/data`` and write the manifest. Returns the manifest."""
+    started = time.perf_counter()
+    data_dir = os.path.join(base_dir, 'data')
+    compiled_dir = compiled_dir or os.path.join(data_dir, 'compiled')
+    datasets, ignored = scan(data_dir)
+
+    entries = {}
+    todo = []
+    for dataset in datasets:
+        csv_path = dataset.path
+        if csv_path in entries:
+            # A fallback round (BCA) served from another round's file
+            entries[csv_path]['rounds'].append(dataset.round)
+            continue
+
+        st = os.stat(csv_path)
+        out_dir = compiled_path(compiled_dir, data_dir, csv_path)
+        meta = None if force else read_meta(out_dir)
+        built = meta['source'] if meta else {}
+        if (built.get('mtime_ns'), built.get('size')) == (st.st_mtime_ns, st.st_size):
+            digest = built['sha256']
+        else:
+            digest = file_digest(csv_path)
+        entry = entries[csv_path] = {
+            'file': os.path.relpath(csv_path, data_dir),
+            'department': dataset.department,
+            'quota': dataset.quota,
+            'rounds': [dataset.round],
+            'year': dataset.year,
+            'sha256': digest,
+            'size': st.st_size,
+        }
+        if meta and built.get('sha256') == digest:
+            entry.update(status='up to date', rows=meta['rows'], rejected=meta['validation'].get('rejected', 0),
+                         errors=[], warnings=meta['validation'].get('warnings', []))
+            continue
+        source = {'path': entry['file'], 'sha256': digest, 'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+        todo.append((csv_path, (csv_path, out_dir, rejects_path(compiled_dir, data_dir, csv_path), source)))
+
+    if workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(min(workers, len(todo))) as pool:
+            results = list(pool.map(_compile_in_worker, [args for _, args in todo]))
+    else:
+        results = [_compile_in_worker(args) for _, args in todo]
+    for (csv_path, _), result in zip(todo, results):
+        entries[csv_path].update(result)
+
+    by_digest = {}
+    for entry in entries.values():
+        by_digest.setdefault(entry['sha256'], []).append(entry['file'])
+    for entry in entries.values():
+        entry['same_content_as'] = [f for f in by_digest[entry['sha256']] if f != entry['file']]
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'seconds': round(time.perf_counter() - started, 3),
+        'tables': list(entries.values()),
+        'ignored': [{'file': os.path.relpath(path, data_dir), 'reason': reason} for path, reason in ignored],
+    }
+    os.makedirs(compiled_dir, exist_ok=True)
+    manifest_path = os.path.join(compiled_dir, MANIFEST_FILE)
+    with open(manifest_path + '.tmp', 'w', encoding='utf-8') as fh:
+        json.dump(manifest, fh, ensure_ascii=False, indent=1)
+    os.replace(manifest_path + '.tmp', manifest_path)
+    return manifest
+
+
+def compile_tables(base_dir=BASE_DIR, compiled_dir=None, force=False, workers=0):
+    """Compile changed CSVs. Returns ``(compiled, skipped)`` lists of CSV paths."""
+    manifest = ingest(base_dir, compiled_dir, force, workers)
+    data_dir = os.path.join(base_dir, 'data')
+    paths = {status: [os.path.join(data_dir, t['file']) for t in manifest['tables'] if t['status'] == status]
+             for status in ('compiled', 'up to date')}
+    return paths['compiled'], paths['up to date']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-dir', default=BASE_DIR, help="directory containing data/")
+    parser.add_argument('--out', default=None, help="output directory (default: data/compiled)")
+    parser.add_argument('--force', action='store_true', help="recompile unchanged CSVs too")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="process pool size for the changed files (0 or 1 compiles in this process)")
+    args = parser.parse_args(argv)
+
+    manifest = ingest(args.base_dir, args.out, args.force, args.workers)
+    tables = manifest['tables']
+    for table in tables:
+        path = os.path.join('data', table['file'])
+        if table['status'] == 'compiled':
+            notes = [f"{table['rows']} rows", f"{table['rejected']} rejected"] + table['warnings']
+            print(f"✅ Compiled: {path} ({', '.join(notes)})")
+        elif table['status'] in ('invalid', 'failed'):
+            print(f"❌ {table['status'].capitalize()}: {path}: {'; '.join(table['errors'])}")
+    for item in manifest['ignored']:
+        print(f"⏭️  Ignored: {os.path.join('data', item['file'])} ({item['reason']})")
+    reported = set()
+    for table in tables:
+        if table['same_content_as'] and table['file'] not in reported:
+            reported.update([table['file']] + table['same_content_as'])
+            print(f"⚠️ Same contents: {', '.join(os.path.join('data', f) for f in [table['file']] + table['same_content_as'])}")
+
+    counts = {status: sum(t['status'] == status for t in tables)
+              for status in ('compiled', 'up to date', 'invalid', 'failed')}
+    out_dir = args.out or os.path.join('data', 'compiled')
+    print(f"{counts['compiled']} compiled, {counts['up to date']} up to date, "
+          f"{counts['invalid'] + counts['failed']} not compiled, {len(manifest['ignored'])} ignored, "
+          f"{sum(t['rejected'] for t in tables)} rows rejected in {manifest['seconds']:.2f}s "
+          f"(manifest: {os.path.join(out_dir, MANIFEST_FILE)})")
+    if counts['invalid'] or counts['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
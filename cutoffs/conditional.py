@@ -0,0 +1,135 @@
+"""Strong ETags and compressed bodies for responses that only change with the data.
+
+A page or API response is a function of the loaded data, the app's code
+and templates, the request path and its query string, and the negotiated
+``Content-Encoding``. :func:`etag` hashes exactly those, so a client or CDN
+revalidating with ``If-None-Match`` can be answered 304 before any
+filtering or rendering. The tag is built from content digests rather than
+per-process counters, so every worker (and every restart on the same
+files) hands out the same tag for the same response.
+
+:func:`compress_stream` gzips or brotli-compresses a streamed body chunk
+by chunk, flushing after each so the first cards still go out early, and
+hands the finished body to a callback for the response cache. Brotli
+needs the optional ``brotli`` package; without it only gzip is offered.
+"""
+import hashlib
+import os
+import zlib
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/x-ndjson', 'application/javascript')
+
+
+def brotli_available():
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_encodings():
+    """Encodings this process can produce, most preferred first."""
+    return ('br', 'gzip') if brotli_available() else ('gzip',)
+
+
+def source_digest(*paths, suffixes=('.py', '.html')):
+    """Digest of the code and template files under ``paths``."""
+    files = []
+    for path in paths:
+        if os.path.isfile(path):
+            files.append(path)
+            continue
+        for root, dirs, names in os.walk(path):
+            dirs[:] = [d for d in dirs if not d.startswith(('.', '__'))]
+            files.extend(os.path.join(root, name) for name in names if name.endswith(suffixes))
+    digest = hashlib.sha256()
+    for path in sorted(files):
+        with open(path, 'rb') as fh:
+            digest.update(hashlib.sha256(fh.read()).digest())
+    return digest.hexdigest()
+
+
+def canonical_query(args):
+    """Query parameters as sorted ``(name, value)`` pairs; ``?a=1&b=2`` equals ``?b=2&a=1``."""
+    return sorted(args.items(multi=True))
+
+
+def etag(data_version, code_version, path, args, encoding=None):
+    """Strong entity tag (unquoted) for one representation of a response."""
+    digest = hashlib.sha256()
+    for part in (data_version, code_version, path):
+        digest.update(f'{part}\0'.encode())
+    for name, value in canonical_query(args):
+        digest.update(f'{name}={value}&'.encode())
+    tag = digest.hexdigest()[:32]
+    return f'{tag}-{encoding}' if encoding else tag
+
+
+def compressible(mimetype):
+    return bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+class _Gzip:
+    def __init__(self):
+        # wbits 31: a gzip header and trailer around the deflate stream
+        self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def process(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class _Brotli:
+    def __init__(self):
+        import brotli
+
+        self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+    def process(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+COMPRESSORS = {'gzip': _Gzip, 'br': _Brotli}
+
+
+def compress(body, encoding):
+    compressor = COMPRESSORS[encoding]()
+    return compressor.process(body) + compressor.finish()
+
+
+def compress_stream(chunks, encoding=None, on_complete=None, max_body=None):
+    """Yield ``chunks`` (bytes) compressed with ``encoding`` (``None`` passes them through).
+
+    Once the stream is exhausted ``on_complete(body)`` receives the whole
+    output, unless it grew beyond ``max_body`` bytes or the client went
+    away first.
+    """
+    compressor = COMPRESSORS[encoding]() if encoding else None
+    kept, size = [], 0
+    for chunk in chunks:
+        if compressor is not None:
+            chunk = compressor.process(chunk)
+        if not chunk:
+            continue
+        size += len(chunk)
+        if kept is not None:
+            kept.append(chunk)
+            if max_body is not None and size > max_body:
+                kept = None
+        yield chunk
+    if compressor is not None:
+        tail = compressor.finish()
+        if kept is not None:
+            kept.append(tail)
+        yield tail
+    if kept is not None and on_complete is not None:
+        on_complete(b''.join(kept))
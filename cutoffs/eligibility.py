@@ -0,0 +1,246 @@
+"""Where can a student get in? One profile against every loaded table at once.
+
+The history tables (:mod:`cutoffs.history`) of all departments and quotas
+are stacked into one matrix of closing ranks and percentiles, one column
+per CAP round. A profile is evaluated with the same rules as the
+/colleges filters, ``rank >= user rank`` and ``percentile <= marks``, as
+whole-array comparisons, and each eligible line reports the last round in
+which it was still attainable.
+"""
+import math
+
+import numpy as np
+
+from .history import KEY_COLUMNS, LABEL_COLUMNS
+from .metrics import stage
+from .registry import QUOTA_DEPARTMENTS, ROUNDS
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def _number(name, value):
+    """``value`` as a float, ``None`` when not given; ``ValueError`` when it is not a number."""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        raise ValueError(f"{name} must be a number, not {value!r}")
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be a number, not {value!r}") from None
+    return None if math.isnan(number) else number
+
+
+def _text(name, value):
+    if isinstance(value, (dict, list, tuple, bool)):
+        raise ValueError(f"{name} must be text, not {value!r}")
+    return str(value).strip()
+
+
+def _split(name, value):
+    """List from a comma separated string (or a list), without blanks."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = value.split(',')
+    elif not isinstance(value, (list, tuple)):
+        raise ValueError(f"{name} must be a comma separated string or a list, not {value!r}")
+    return [item for item in (_text(name, item) for item in value) if item]
+
+
+def parse_profile(args):
+    """A student profile from query args or a JSON object.
+
+    ``rank``/``merit_score`` and ``percentile``/``marks``/``experience``
+    are the student's numbers; ``category``, ``departments``, ``quota``
+    (AI or MH) and ``courses`` narrow the search and may be comma
+    separated lists. Raises ``ValueError`` for a value of the wrong type,
+    such as a rank that is not a number.
+    """
+    def first(*names):
+        for name in names:
+            value = args.get(name)
+            if value not in (None, ''):
+                return name, value
+        return names[0], None
+
+    quota_name, quota = first('quota', 'gender')
+    return {
+        'rank': _number(*first('rank', 'merit_score')),
+        'percentile': _number(*first('percentile', 'marks', 'experience')),
+        'categories': _split(*first('category', 'categories')),
+        'departments': _split(*first('departments', 'department')),
+        'quota': _text(quota_name, quota).upper() if quota is not None else '',
+        'courses': _split(*first('courses', 'course', 'specialty')),
+    }
+
+
+def _first(keys, limit):
+    """``np.lexsort(keys)[:limit]`` without sorting every entry.
+
+    Each key, primary (last) first, is partitioned around its ``limit``-th
+    value: entries below it are in, entries above it are out, and only the
+    ties go on to the next key. The chosen few are then lexsorted.
+    """
+    if len(keys[0]) <= limit:
+        return np.lexsort(keys)
+    chosen = []
+    candidates = np.arange(len(keys[0]))
+    need = limit
+    for key in reversed(keys):
+        if len(candidates) <= need:
+            break
+        values = key[candidates]
+        kth = np.partition(values, need - 1)[need - 1]
+        below = values < kth
+        chosen.append(candidates[below])
+        need -= int(below.sum())
+        candidates = candidates[values == kth]
+    # Ties on every key keep their input order, as in a (stable) lexsort
+    chosen.append(candidates[:need])
+    picked = np.sort(np.concatenate(chosen))
+    return picked[np.lexsort(tuple(key[picked] for key in keys))]
+
+
+class EligibilityIndex:
+    """Closing rank/percentile per round for every cutoff line of every table."""
+
+    def __init__(self, tables, generation=0):
+        import pandas as pd
+
+        # Distinguishes rebuilds, e.g. in result cache keys
+        self.generation = generation
+        metas, ranks, percentiles = [], [], []
+        for (department, quota), table in tables.items():
+            rows = table.rows
+            metas.append(rows[list(KEY_COLUMNS + LABEL_COLUMNS) + ['year']].assign(
+                department=department, quota_group=quota))
+            n = len(rows)
+            ranks.append(np.column_stack([
+                rows[f'rank_{r}'].to_numpy(dtype=np.float64) if f'rank_{r}' in rows else np.full(n, np.nan)
+                for r in ROUNDS]))
+            percentiles.append(np.column_stack([
+                rows[f'percentile_{r}'].to_numpy(dtype=np.float64) if f'percentile_{r}' in rows else np.full(n, np.nan)
+                for r in ROUNDS]))
+
+        if metas:
+            self.meta = pd.concat(metas, ignore_index=True)
+            self.ranks = np.vstack(ranks)
+            self.percentiles = np.vstack(percentiles)
+        else:
+            self.meta = pd.DataFrame(columns=list(KEY_COLUMNS + LABEL_COLUMNS) + ['year', 'department', 'quota_group'])
+            self.ranks = self.percentiles = np.empty((0, len(ROUNDS)))
+        self.available = ~(np.isnan(self.ranks) & np.isnan(self.percentiles))
+
+        # JSON-ready label columns (None for blanks), so shortlists skip pandas per option
+        self._labels = {}
+        for column in self.meta.columns:
+            values = self.meta[column].astype(object)
+            self._labels[column] = np.array(values.where(values.notna() & (values != ''), None), dtype=object)
+        if len(self.meta):
+            self._labels['quota_group'][~self.meta['department'].isin(QUOTA_DEPARTMENTS).to_numpy()] = None
+
+        # Factorized filter columns, so profile filters are integer comparisons
+        self._codes = {}
+        for column in ('department', 'quota_group', 'category', 'course_name'):
+            codes, uniques = pd.factorize(self.meta[column])
+            self._codes[column] = (codes, {value: i for i, value in enumerate(uniques)})
+
+    def __len__(self):
+        return len(self.meta)
+
+    def _matching(self, column, values):
+        codes, lookup = self._codes[column]
+        wanted = [lookup[value] for value in values if value in lookup]
+        return np.isin(codes, wanted)
+
+    def candidate_rows(self, profile):
+        """Boolean mask of the lines a profile's filters (not its numbers) allow."""
+        mask = np.ones(len(self.meta), dtype=bool)
+        if profile['departments']:
+            mask &= self._matching('department', profile['departments'])
+        if profile['quota'] in ('AI', 'MH'):
+            # Only the quota-split departments have an AI/MH dimension
+            codes, lookup = self._codes['quota_group']
+            mask &= (codes == lookup.get(profile['quota'], -2)) | (codes == lookup.get('', -2))
+        if profile['categories']:
+            mask &= self._matching('category', profile['categories'])
+        if profile['courses']:
+            mask &= self._matching('course_name', profile['courses'])
+        return mask
+
+    def eligible(self, profile, rows=None):
+        """``(rows, ok)``: candidate line ids and their per-round eligibility matrix."""
+        if rows is None:
+            rows = np.flatnonzero(self.candidate_rows(profile))
+        ok = self.available[rows]
+        # Filter by Rank: cutoff rank >= user rank (user eligible)
+        if profile['rank'] is not None:
+            with np.errstate(invalid='ignore'):
+                ok = ok & (self.ranks[rows] >= profile['rank'])
+        # Filter by Cutoff (Percentile): cutoff <= user marks
+        if profile['percentile'] is not None:
+            with np.errstate(invalid='ignore'):
+                ok = ok & (self.percentiles[rows] <= profile['percentile'])
+        return rows, ok
+
+    def shortlist(self, profile, limit=DEFAULT_LIMIT):
+        """``(total, options)``: eligible lines, most competitive first.
+
+        Each option carries the last round in which it was attainable and
+        that round's closing rank and percentile. Options are ordered by
+        that percentile (highest first), then rank.
+        """
+        if profile['rank'] is None and profile['percentile'] is None:
+            return 0, []
+        rows, ok = self.eligible(profile)
+        attainable = ok.any(axis=1)
+        return self.options(rows[attainable], ok[attainable], limit)
+
+    def options(self, rows, ok, limit=DEFAULT_LIMIT):
+        """``(total, options)`` for eligible line ids (in any order) and their per-round eligibility."""
+        n_rounds = ok.shape[1]
+        last = n_rounds - 1 - np.argmax(ok[:, ::-1], axis=1)
+
+        last_rank = self.ranks[rows, last]
+        last_percentile = self.percentiles[rows, last]
+        # Percentile descending with missing last, then rank ascending, then line id
+        order = _first((rows, np.nan_to_num(last_rank, nan=np.inf),
+                        np.nan_to_num(-last_percentile, nan=np.inf)), limit)
+
+        lines = rows[order]
+        columns = {column: values[lines].tolist() for column, values in self._labels.items()}
+        # Plain Python values from here on, so each option costs no numpy scalar work
+        rounds = ok[order].tolist()
+        last_rounds = last[order].tolist()
+        option_ranks = last_rank[order].tolist()
+        option_percentiles = last_percentile[order].tolist()
+        options = []
+        for n in range(len(order)):
+            record = {column: values[n] for column, values in columns.items()}
+            record['last_round'] = ROUNDS[last_rounds[n]]
+            record['rounds'] = [round_no for round_no, attainable in zip(ROUNDS, rounds[n]) if attainable]
+            rank, percentile = option_ranks[n], option_percentiles[n]
+            record['rank'] = None if math.isnan(rank) else int(rank)
+            record['percentile'] = None if math.isnan(percentile) else percentile
+            options.append(record)
+        return int(len(rows)), options
+
+
+class Shortlister:
+    """An :class:`EligibilityIndex` kept in step with a :class:`CutoffHistory`."""
+
+    def __init__(self, history):
+        self.history = history
+        self._tables = None
+        self._index = None
+
+    def index(self):
+        tables = self.history.tables()
+        if tables is not self._tables:
+            generation = self._index.generation + 1 if self._index is not None else 1
+            with stage('eligibility_index'):
+                self._index = EligibilityIndex(tables, generation)
+            self._tables = tables
+        return self._index
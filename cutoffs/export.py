@@ -0,0 +1,86 @@
+"""Chunked export of filtered cutoff rows as CSV, JSON Lines or XLSX.
+
+Rows go out ``CHUNK_ROWS`` at a time straight from the table's columns,
+in the canonical ``EXPORT_FIELDS`` schema (blank where a table lacks a
+column), so an export never holds more than one chunk of values, let
+alone the card dicts or the page HTML. XLSX needs the optional
+``openpyxl`` package; its write-only workbook spools rows to a temporary
+file that is then streamed out.
+"""
+import csv
+import io
+import json
+import tempfile
+
+from .records import ROW_FIELDS, to_rows
+
+EXPORT_FIELDS = ROW_FIELDS
+CHUNK_ROWS = 2000
+
+FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+
+def xlsx_available():
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def row_chunks(table, rows, fields=EXPORT_FIELDS, chunk_rows=CHUNK_ROWS):
+    """Lists of value lists in ``fields`` order, ``chunk_rows`` rows at a time."""
+    present = [field for field in fields if field in table.df.columns]
+    for start in range(0, len(rows), chunk_rows):
+        chunk = to_rows(table.df.take(rows[start:start + chunk_rows]), present)
+        yield [[row.get(field) for field in fields] for row in chunk]
+
+
+def _csv_value(value):
+    # Whole floats (ranks parsed as float) read as integers in spreadsheets anyway
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def csv_stream(table, rows, fields=EXPORT_FIELDS):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for chunk in row_chunks(table, rows, fields):
+        writer.writerows([_csv_value(value) for value in values] for values in chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def jsonl_stream(table, rows, fields=EXPORT_FIELDS):
+    for chunk in row_chunks(table, rows, fields):
+        yield ''.join(json.dumps(dict(zip(fields, values))) + '\n' for values in chunk)
+
+
+def xlsx_stream(table, rows, fields=EXPORT_FIELDS, sheet_title='Cutoffs', read_size=64 * 1024):
+    """Requires ``openpyxl`` (see :func:`xlsx_available`)."""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_title[:31])
+    sheet.append(list(fields))
+    for chunk in row_chunks(table, rows, fields):
+        for values in chunk:
+            sheet.append([_csv_value(value) for value in values])
+
+    with tempfile.TemporaryFile() as fh:
+        workbook.save(fh)
+        fh.seek(0)
+        for block in iter(lambda: fh.read(read_size), b''):
+            yield block
+
+
+STREAMS = {'csv': csv_stream, 'jsonl': jsonl_stream, 'xlsx': xlsx_stream}
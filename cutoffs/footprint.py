@@ -0,0 +1,81 @@
+"""Bytes per cutoff table and column, as parsed and after compaction.
+
+Usage::
+
+    python -m cutoffs.footprint [--columns] [--json]
+
+Reads every CSV under data/, normalizes it and prints its deep memory
+footprint (string objects included) before and after
+:func:`cutoffs.compact.compact_frame`, per table and optionally per
+column. Compiled tables hold the compacted form, memory-mapped.
+"""
+import argparse
+import json
+import os
+
+from .compact import compact_frame
+from .ingest import read_csv
+from .normalize import normalize_frame
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def column_bytes(df):
+    """``{column: (dtype, bytes)}`` including the string objects behind object columns."""
+    usage = df.memory_usage(deep=True, index=False)
+    return {name: (str(df[name].dtype), int(usage.iloc[i])) for i, name in enumerate(df.columns)}
+
+
+def table_report(csv_path):
+    df = normalize_frame(read_csv(csv_path))
+    before = column_bytes(df)
+    after = column_bytes(compact_frame(df))
+    return {
+        'rows': len(df),
+        'before': sum(size for _, size in before.values()),
+        'after': sum(size for _, size in after.values()),
+        'columns': {name: {'dtype_before': before[name][0], 'bytes_before': before[name][1],
+                           'dtype_after': after[name][0], 'bytes_after': after[name][1]} for name in before},
+    }
+
+
+def format_report(report, columns=False):
+    mb = 1024 * 1024
+    lines = [f"{'table':<70} {'rows':>6} {'before':>9} {'after':>9}"]
+    for path, table in report['tables'].items():
+        lines.append(f"{path:<70} {table['rows']:>6} {table['before'] / mb:>7.2f}MB {table['after'] / mb:>7.2f}MB")
+        if columns:
+            for name, column in table['columns'].items():
+                lines.append(f"    {name:<28} {column['dtype_before']:>9} {column['bytes_before'] / 1024:>9.1f}kB"
+                             f" -> {column['dtype_after']:>10} {column['bytes_after'] / 1024:>9.1f}kB")
+    before, after = report['before'], report['after']
+    lines.append(f"{len(report['tables'])} tables: {before / mb:.1f}MB -> {after / mb:.1f}MB "
+                 f"({after / before:.0%})" if before else "no tables")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--base-dir', default=BASE_DIR, help="directory containing data/")
+    parser.add_argument('--columns', action='store_true', help="break every table down per column")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    from .registry import discover
+
+    data_dir = os.path.join(args.base_dir, 'data')
+    tables = {}
+    for dataset in discover(data_dir):
+        name = os.path.relpath(dataset.path, data_dir)
+        if name not in tables:
+            tables[name] = table_report(dataset.path)
+    report = {
+        'tables': tables,
+        'before': sum(table['before'] for table in tables.values()),
+        'after': sum(table['after'] for table in tables.values()),
+    }
+    print(json.dumps(report, indent=1) if args.json else format_report(report, args.columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Pre-rendered result cards, memoized per table row.
+
+A card's HTML, including its ``data-doctor`` JSON, depends only on the row
+(or, for MTech, the institute's rows), the card template family and the
+department/quota defaults :func:`cutoffs.records.to_records` fills in. So
+:class:`CardFragments` renders every card once and keeps it in a
+:class:`~cutoffs.cache.ResultCache` keyed by the table's path and content
+digest. A grid page then looks its cards up in result order and joins
+them; only cards not seen since the last reload are materialized and
+rendered.
+"""
+import sys
+
+import numpy as np
+from markupsafe import Markup
+
+from .cache import MISSING
+from .metrics import stage
+from .records import group_by_institute, to_records
+
+
+def card_renderer(env, name='partials/{family}_card.html'):
+    """``render(family, card)`` over the card templates of a Jinja environment.
+
+    A card renders with ``doctor`` set to the card, as the ``{% include %}``
+    in the grid loop it replaces saw it. :class:`CardFragments` keeps the
+    output, so each card goes through Jinja once per table version.
+    """
+    def render(family, card):
+        return Markup(env.get_template(name.format(family=family)).render(doctor=card))
+    return render
+
+
+class CardFragments:
+    """Card HTML per (table, family, defaults, row ids).
+
+    ``render(family, card)`` turns one card dict into HTML (the
+    ``partials/<family>_card.html`` template).
+    """
+
+    def __init__(self, render, cache):
+        self.render = render
+        self.cache = cache
+
+    def cards(self, table, family, department, location, groups, grouped=False):
+        """HTML of one card per entry of ``groups``, in order.
+
+        ``groups`` holds one row id per card, or with ``grouped=True`` one
+        array of row ids per card (an MTech institute with all its
+        cutoffs).
+        """
+        prefix = (table.path, table.digest, family, department, location)
+        keys = [prefix + ((tuple(group.tolist()) if grouped else int(group)),) for group in groups]
+        html = [self.cache.get(key) for key in keys]
+        missing = [i for i, fragment in enumerate(html) if fragment is MISSING]
+        if not missing:
+            return html
+
+        with stage('materialize'):
+            if grouped:
+                rows = np.concatenate([groups[i] for i in missing])
+                cards = group_by_institute(to_records(table.df.take(rows), department, location),
+                                           [len(groups[i]) for i in missing])
+            else:
+                cards = to_records(table.df.take(np.asarray(groups)[missing]), department, location)
+        with stage('render'):
+            for i, card in zip(missing, cards):
+                html[i] = self.render(family, card)
+                self.cache.put(keys[i], html[i], size=sys.getsizeof(html[i]))
+        return html
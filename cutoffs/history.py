@@ -0,0 +1,145 @@
+"""Cutoff history across CAP rounds (and years) in one pre-joined table.
+
+Every loaded table of a (department, quota) pair is stacked with its
+round and year, and collapsed to one row per cutoff key and year with a
+``rank_<round>``/``percentile_<round>`` column pair per round. When a key
+repeats within a round the closing values are kept (highest rank, lowest
+percentile). Institute and choice code posting lists make the whole
+trajectory of an institute or branch a single lookup.
+"""
+import threading
+
+import numpy as np
+
+from .metrics import stage
+from .registry import table_key
+
+# Columns that identify one cutoff line across rounds, where a table has them
+KEY_COLUMNS = ('institute_code', 'choice_code', 'category', 'quota', 'seat_type', 'gender')
+LABEL_COLUMNS = ('institute_name', 'course_name', 'university')
+
+
+def table_year(dataset, df):
+    """The academic year in the file name, else the table's own ``year`` column."""
+    if dataset.year:
+        return dataset.year
+    if 'year' in df.columns and df['year'].notna().any():
+        return str(df['year'].mode().iloc[0])
+    return ''
+
+
+class HistoryTable:
+    """All rounds of one (department, quota) pair, one row per key and year."""
+
+    def __init__(self, department, quota, parts):
+        """``parts`` is a list of ``(round, year, df)`` for every loaded table."""
+        import pandas as pd
+
+        from .index import ColumnIndex
+
+        self.department = department
+        self.quota = quota
+        self.rounds = sorted({round_no for round_no, _, _ in parts})
+
+        frames = []
+        for round_no, year, df in parts:
+            columns = [c for c in KEY_COLUMNS + LABEL_COLUMNS + ('rank', 'percentile') if c in df.columns]
+            frame = df[columns].copy()
+            for column in KEY_COLUMNS + LABEL_COLUMNS:
+                frame[column] = frame[column].astype(object) if column in frame.columns else None
+            if 'rank' in frame.columns:
+                # Nullable integer ranks; the joined round columns use NaN for gaps anyway
+                frame['rank'] = frame['rank'].astype(np.float64)
+            frames.append(frame.assign(year=year, round=round_no))
+        long = pd.concat(frames, ignore_index=True)
+        keys = list(KEY_COLUMNS) + ['year']
+        long[keys] = long[keys].fillna('')
+
+        grouped = long.groupby(keys + ['round'], sort=False)
+        closing = grouped.agg(rank=('rank', 'max'), percentile=('percentile', 'min'))
+        wide = closing.unstack('round')
+        wide.columns = [f'{value}_{round_no}' for value, round_no in wide.columns]
+        labels = long.groupby(keys, sort=False)[list(LABEL_COLUMNS)].first()
+
+        rows = labels.join(wide).reset_index()
+        self.rows = rows.sort_values(['institute_code', 'choice_code', 'category', 'quota', 'year'],
+                                     kind='stable', ignore_index=True)
+        self.by_institute = ColumnIndex(self.rows['institute_code'])
+        self.by_choice = ColumnIndex(self.rows['choice_code'])
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, code, category=None, year=None):
+        """History rows for an institute code or a choice/branch code."""
+        rows = np.union1d(self.by_institute.rows(code), self.by_choice.rows(code))
+        frame = self.rows.take(rows)
+        if category:
+            frame = frame[frame['category'] == category]
+        if year:
+            frame = frame[frame['year'] == year]
+        return self.records(frame)
+
+    def records(self, frame):
+        """JSON-ready dicts with a ``rounds`` list (``None`` where a round has no cutoff)."""
+        import pandas as pd
+
+        records = []
+        for row in frame.to_dict('records'):
+            record = {column: row[column] or None for column in KEY_COLUMNS + LABEL_COLUMNS + ('year',)}
+            record['rounds'] = []
+            for round_no in self.rounds:
+                rank, percentile = row.get(f'rank_{round_no}'), row.get(f'percentile_{round_no}')
+                if pd.isna(rank) and pd.isna(percentile):
+                    record['rounds'].append(None)
+                    continue
+                record['rounds'].append({
+                    'round': round_no,
+                    'rank': None if pd.isna(rank) else int(rank),
+                    'percentile': None if pd.isna(percentile) else float(percentile),
+                })
+            records.append(record)
+        return records
+
+
+class CutoffHistory:
+    """History tables for every (department, quota) pair of a :class:`CutoffStore`.
+
+    Built on first use and rebuilt on the first lookup after the store
+    reloads, so a reload never waits for it.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self._tables = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _build(self):
+        parts = {}
+        seen = set()
+        for dataset in self.store.datasets():
+            # Fallback rounds (BCA) reuse another round's file; skip the repeat
+            if dataset.path in seen:
+                continue
+            seen.add(dataset.path)
+            table = self.store.get(dataset.department, dataset.quota, dataset.round, year=dataset.year)
+            if table is None:
+                continue
+            parts.setdefault((dataset.department, dataset.quota), []).append(
+                (dataset.round, table_year(dataset, table.df), table.df))
+        return {key: HistoryTable(*key, group) for key, group in parts.items()}
+
+    def tables(self):
+        with self._lock:
+            if self._version != self.store.version:
+                version = self.store.version
+                with stage('history'):
+                    self._tables = self._build()
+                self._version = version
+            return self._tables
+
+    def get(self, department, location):
+        key = table_key(department, location, '')[:2]
+        self.store.require(key[0])
+        return self.tables().get(key)
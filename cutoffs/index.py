@@ -0,0 +1,228 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Columns the /colleges dropdowns filter on by exact match
+INDEXED_COLUMNS = ('course_name', 'category', 'seat_type', 'university', 'area', 'quota')
+
+AI_QUOTA = re.compile(r'AI|All India', re.IGNORECASE)
+
+EMPTY_ROWS = np.empty(0, dtype=np.int32)
+
+
+class ColumnIndex:
+    """Inverted index over one column: value -> sorted array of row ids.
+
+    Row ids for all values live in one array grouped by value, so a posting
+    list is a slice and the per-value counts fall out of the slice bounds.
+    """
+
+    def __init__(self, series):
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            # Dictionary encoded already: the category codes are the factorization
+            series = series.cat.remove_unused_categories()
+            codes, uniques = series.cat.codes.to_numpy(), series.cat.categories
+        else:
+            try:
+                codes, uniques = pd.factorize(series, sort=True)
+            except TypeError:
+                # Mixed value types can't be ordered; keep first-seen order
+                codes, uniques = pd.factorize(series)
+        self.values = list(uniques)
+        self.codes = codes.astype(np.int32)
+        self._position = {value: i for i, value in enumerate(self.values)}
+
+        # A stable sort keeps row ids ascending within every value
+        order = np.argsort(self.codes, kind='stable').astype(np.int32)
+        self._rows = order
+        self._bounds = np.searchsorted(self.codes[order], np.arange(len(self.values) + 1))
+
+    def rows(self, value):
+        i = self._position.get(value)
+        if i is None:
+            return EMPTY_ROWS
+        return self._rows[self._bounds[i]:self._bounds[i + 1]]
+
+    def rows_matching(self, predicate):
+        """Union of the posting lists of every value ``predicate`` accepts."""
+        lists = [self.rows(value) for value in self.values if predicate(value)]
+        if not lists:
+            return EMPTY_ROWS
+        return np.sort(np.concatenate(lists))
+
+    def counts(self):
+        sizes = np.diff(self._bounds)
+        return {value: int(size) for value, size in zip(self.values, sizes)}
+
+
+class SortedColumn:
+    """Presorted numeric column answering range queries with ``searchsorted``.
+
+    ``order`` lists row ids by ascending value with missing values last, so
+    any ``low <= value <= high`` range is one contiguous slice of it.
+    """
+
+    def __init__(self, series):
+        self.values = pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+        self.order = np.argsort(self.values, kind='stable').astype(np.int32)
+        self.sorted = self.values[self.order]
+        self.n_valid = int(np.count_nonzero(~np.isnan(self.values)))
+
+    def range_rows(self, low=None, high=None):
+        valid = self.sorted[:self.n_valid]
+        start = 0 if low is None else np.searchsorted(valid, low, side='left')
+        stop = self.n_valid if high is None else np.searchsorted(valid, high, side='right')
+        return self.order[start:max(start, stop)]
+
+
+class TableIndex:
+    """Posting lists for the exact-match filters of one cutoff table, plus
+    rank and percentile orderings for the range filters and result order."""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.columns = {
+            column: ColumnIndex(df[column]) for column in INDEXED_COLUMNS if column in df.columns
+        }
+        self.rank = SortedColumn(df['rank']) if 'rank' in df.columns else None
+        self.percentile = SortedColumn(df['percentile']) if 'percentile' in df.columns else None
+
+        # Result order: percentile descending, missing last, ties by row id
+        if self.percentile is not None:
+            self.by_percentile = np.lexsort(
+                (np.arange(self.n_rows), -self.percentile.values)).astype(np.int32)
+        else:
+            self.by_percentile = np.arange(self.n_rows, dtype=np.int32)
+        self._percentile_position = np.empty(self.n_rows, dtype=np.int32)
+        self._percentile_position[self.by_percentile] = np.arange(self.n_rows, dtype=np.int32)
+
+        # Rows whose quota reads as All India ('AI', 'AI-AI', 'All India', ...)
+        if 'quota' in self.columns:
+            self.ai_quota_rows = self.columns['quota'].rows_matching(
+                lambda value: isinstance(value, str) and AI_QUOTA.search(value) is not None)
+        else:
+            self.ai_quota_rows = EMPTY_ROWS
+
+    def __contains__(self, column):
+        return column in self.columns
+
+    def values(self, column):
+        if column not in self.columns:
+            return []
+        return self.columns[column].values
+
+    def counts(self, column):
+        if column not in self.columns:
+            return {}
+        return self.columns[column].counts()
+
+    def quota_rows(self, location):
+        """Rows whose quota contains ``location`` (AI matches any All India spelling)."""
+        if location == 'AI':
+            return self.ai_quota_rows
+        return self.columns['quota'].rows_matching(
+            lambda value: isinstance(value, str) and location in value)
+
+    def intersect(self, filters):
+        """Row ids matching every ``(column, value)`` pair, or ``None`` for no filter.
+
+        ``value`` may also be a precomputed row id array (e.g. from
+        :meth:`quota_rows` or a range slice), in any order. Columns without an index are skipped, as the
+        routes skip filters on columns a CSV does not have.
+        """
+        lists = []
+        for column, value in filters:
+            if isinstance(value, np.ndarray):
+                lists.append(value)
+            elif column in self.columns:
+                lists.append(self.columns[column].rows(value))
+        if not lists:
+            return None
+
+        # Intersect smallest first so every step works on the shortest list
+        lists.sort(key=len)
+        rows = lists[0]
+        for other in lists[1:]:
+            if not len(rows):
+                break
+            rows = np.intersect1d(rows, other, assume_unique=True)
+        return rows
+
+    def order_by_percentile(self, rows):
+        """Return ``rows`` (or every row, for ``None``) by descending percentile."""
+        if rows is None:
+            return self.by_percentile
+        if len(rows) * 4 > self.n_rows:
+            # Dense result: one pass over the presorted order
+            keep = np.zeros(self.n_rows, dtype=bool)
+            keep[rows] = True
+            return self.by_percentile[keep[self.by_percentile]]
+        return rows[np.argsort(self._percentile_position[rows], kind='stable')]
+
+
+class InstituteIndex:
+    """Rows of each institute as one contiguous range, plus per-institute summaries.
+
+    Row ids are grouped by institute code in one array (a
+    :class:`ColumnIndex` over the canonical codes), so an institute's rows
+    are a slice and grouping a result set works on integer codes. Codes
+    are canonicalized at load, so lookups compare them as they are.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self.by_code = ColumnIndex(df['institute_code'])
+        self.codes = self.by_code.codes
+        self._summaries = {}
+
+    def __contains__(self, code):
+        return len(self.rows(code)) > 0
+
+    def rows(self, code):
+        """Row ids of one institute, ascending."""
+        return self.by_code.rows(code)
+
+    def groups(self, rows):
+        """Split ordered ``rows`` into one array per institute, by first appearance."""
+        if not len(rows):
+            return []
+        # Missing codes (-1) form their own group
+        keys = self.codes[rows] + 1
+        first_seen = pd.unique(keys)
+        position = np.empty(len(self.by_code.values) + 1, dtype=np.int32)
+        position[first_seen] = np.arange(len(first_seen), dtype=np.int32)
+        group = position[keys]
+        order = np.argsort(group, kind='stable')
+        bounds = np.cumsum(np.bincount(group, minlength=len(first_seen)))[:-1]
+        return np.split(rows[order], bounds)
+
+    def summary(self, code):
+        """Name, university, status and branch list of an institute (``None`` if unknown).
+
+        Built from the institute's own rows on first use and cached.
+        """
+        summary = self._summaries.get(code)
+        if summary is None:
+            rows = self.rows(code)
+            if not len(rows):
+                return None
+            first = rows[0]
+            df = self.df
+
+            def first_value(column, default):
+                return df[column].iat[first] if column in df.columns else default
+
+            status = first_value('status', None)
+            branches = []
+            if 'course_name' in df.columns:
+                branches = [b for b in pd.unique(df['course_name'].take(rows)) if isinstance(b, str)]
+            summary = self._summaries[code] = {
+                'code': code,
+                'name': first_value('institute_name', first_value('institution_name', 'Unknown')),
+                'university': first_value('university', 'N/A'),
+                'status': status if isinstance(status, str) else None,
+                'branches': branches,
+                'rows': len(rows),
+            }
+        return summary
@@ -0,0 +1,81 @@
+"""Vectorized parsers shared by the app's loader and ``python -m cutoffs.compile``.
+
+The column parsers take and return whole columns and never run Python
+per row (area extraction runs once per distinct institute name).
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+# "1234 (98.5)", "1234(98.5)", "1234" -> rank 1234, percentile 98.5 / missing
+MERIT_PATTERN = r'^\D*(?P<rank>\d+(?:\.\d+)?)(?:\D+(?P<percentile>\d+(?:\.\d+)?))?'
+
+# Code columns arrive as ints, floats ("100220010.0"), zero-padded strings
+# ("0100220110") or with a spreadsheet apostrophe ("'1005")
+CODE_COLUMNS = ('institute_code', 'choice_code', 'branch_code')
+
+# Institute names without a ", Area" suffix
+DEFAULT_AREA = 'Others'
+
+
+def read_csv(csv_path):
+    try:
+        return pd.read_csv(csv_path, encoding='utf-8')
+    except UnicodeDecodeError:
+        return pd.read_csv(csv_path, encoding='cp1252')
+
+
+def split_merit(series):
+    """Split combined merit strings into a ``rank``/``percentile`` float frame.
+
+    The first number is the merit rank and the second (usually in
+    brackets) the percentile; either is NaN when absent.
+    """
+    parts = series.astype('string').str.extract(MERIT_PATTERN)
+    return pd.DataFrame({
+        'rank': pd.to_numeric(parts['rank'], errors='coerce').astype('float64'),
+        'percentile': pd.to_numeric(parts['percentile'], errors='coerce').astype('float64'),
+    }, index=series.index)
+
+
+def bracketed_number(series):
+    """The number inside "(...)" where present, else the value unchanged."""
+    extracted = series.astype('string').str.extract(r'\(([\d\.]+)\)')[0]
+    return extracted.astype(object).where(extracted.notna(), series)
+
+
+def extract_area(names):
+    """Area from "Institute Name, Area" names: the text after the last comma.
+
+    Names without a comma (and missing names) get ``DEFAULT_AREA``.
+    """
+    codes, uniques = pd.factorize(names)
+    uniques = pd.Series(uniques, dtype='string')
+    areas = uniques.str.rsplit(',', n=1).str[-1].str.strip()
+    areas = areas.where(uniques.str.contains(',', regex=False), DEFAULT_AREA).astype(object)
+    lookup = np.append(areas.to_numpy(dtype=object), DEFAULT_AREA)
+    # factorize marks missing names -1, which picks the trailing default
+    return pd.Series(lookup[codes], index=names.index, dtype=object)
+
+
+def canonical_codes(series):
+    """Render institute/branch/choice codes as plain digit strings.
+
+    Codes repeat on every cutoff row of a branch, so the string work runs
+    once per distinct value.
+    """
+    positions, uniques = pd.factorize(series)
+    codes = pd.Series(uniques).astype('string').str.strip().str.lstrip("'")
+    codes = codes.str.replace(r'\.0+$', '', regex=True).str.replace(r'^0+(?=\d)', '', regex=True)
+    # factorize marks missing values -1, which picks the trailing NaN
+    lookup = np.append(codes.astype(object).where(codes.notna(), np.nan).to_numpy(dtype=object), np.nan)
+    return pd.Series(lookup[positions], index=series.index, dtype=object)
+
+
+def canonical_code(value):
+    """:func:`canonical_codes` for a single value, e.g. a ``?code=`` argument."""
+    if value is None:
+        return None
+    code = str(value).strip().lstrip("'")
+    return re.sub(r'^0+(?=\d)', '', re.sub(r'\.0+$', '', code))
@@ -0,0 +1,102 @@
+"""Unique vs shared memory of the app's worker processes (Linux).
+
+Usage::
+
+    python -m cutoffs.memory MASTER_PID [--json]
+
+Reads ``/proc/<pid>/smaps_rollup`` for a gunicorn master and each of its
+workers. ``unique`` (USS) is what a worker holds privately and would free
+on exit, ``shared`` is resident in more than one process (the preloaded
+tables and memory-mapped compiled columns when sharing works), and
+``pss`` splits every shared page evenly between the processes using it,
+so the PSS of all processes adds up to the real footprint.
+"""
+import argparse
+import json
+import os
+
+# smaps fields, in kB
+_FIELDS = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty', 'Swap')
+
+
+def _read_smaps(pid):
+    totals = dict.fromkeys(_FIELDS, 0)
+    for name in ('smaps_rollup', 'smaps'):
+        try:
+            with open(f'/proc/{pid}/{name}') as fh:
+                for line in fh:
+                    field, _, rest = line.partition(':')
+                    if field in totals:
+                        totals[field] += int(rest.split()[0])
+            return totals
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def process_memory(pid='self'):
+    """``{'rss', 'pss', 'unique', 'shared', 'swap'}`` in bytes, or ``None`` off Linux."""
+    smaps = _read_smaps(pid)
+    if smaps is None:
+        return None
+    return {
+        'rss': smaps['Rss'] * 1024,
+        'pss': smaps['Pss'] * 1024,
+        'unique': (smaps['Private_Clean'] + smaps['Private_Dirty']) * 1024,
+        'shared': (smaps['Shared_Clean'] + smaps['Shared_Dirty']) * 1024,
+        'swap': smaps['Swap'] * 1024,
+    }
+
+
+def child_pids(pid):
+    """Direct children of ``pid`` (gunicorn workers of a master)."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as fh:
+                # The command name may contain spaces; the ppid follows its closing paren
+                ppid = int(fh.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == int(pid):
+            children.append(int(entry))
+    return sorted(children)
+
+
+def worker_report(master_pid):
+    """``process_memory`` of the master and every worker, master first."""
+    report = []
+    for role, pid in [('master', int(master_pid))] + [('worker', p) for p in child_pids(master_pid)]:
+        memory = process_memory(pid)
+        if memory is not None:
+            report.append(dict(memory, pid=pid, role=role))
+    return report
+
+
+def format_report(report):
+    mb = 1024 * 1024
+    lines = [f"{'role':<8} {'pid':>7} {'rss':>9} {'unique':>9} {'shared':>9} {'pss':>9}"]
+    for row in report:
+        lines.append(f"{row['role']:<8} {row['pid']:>7} {row['rss'] / mb:>7.1f}MB {row['unique'] / mb:>7.1f}MB "
+                     f"{row['shared'] / mb:>7.1f}MB {row['pss'] / mb:>7.1f}MB")
+    workers = [row for row in report if row['role'] == 'worker']
+    if workers:
+        lines.append(f"{len(workers)} workers: {sum(r['unique'] for r in workers) / mb:.1f}MB unique, "
+                     f"{sum(r['pss'] for r in report) / mb:.1f}MB total PSS")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('master_pid', type=int, help="gunicorn master (or any parent) process id")
+    parser.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = worker_report(args.master_pid)
+    print(json.dumps(report, indent=1) if args.json else format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,163 @@
+"""Request stage timings and counters in the Prometheus text format.
+
+A request is split into named stages (dataset resolution, filtering,
+sort, materialization, template render; load and normalization when a
+table is parsed). :func:`stage` times a block into the
+``cutoff_stage_seconds`` histogram and, inside a request started with
+:func:`start_request`, into that request's list for the ``Server-Timing``
+header. Code outside a request (the loader, the CLIs) only feeds the
+histogram, so the library modules can time themselves without knowing
+about Flask.
+"""
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+# Seconds; request stages are sub-millisecond to a few seconds on a cold load
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label value tuple."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last one is +Inf), sum
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+
+    def samples(self):
+        with self._lock:
+            series = {key: (list(counts), total) for key, (counts, total) in self._series.items()}
+        for key, (counts, total) in sorted(series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                yield f'{self.name}_bucket', _labels(self.labels, key, [('le', _number(bound))]), cumulative
+            yield f'{self.name}_sum', _labels(self.labels, key), total
+            yield f'{self.name}_count', _labels(self.labels, key), cumulative
+
+
+class Gauge:
+    """Values read at scrape time from ``collect()``, an iterable of ``(label values, value)``.
+
+    ``kind='counter'`` exports monotonically increasing totals kept elsewhere
+    (e.g. cache hit counts) with the counter type.
+    """
+
+    def __init__(self, name, help, labels=(), collect=None, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.collect = collect
+        self.kind = kind
+
+    def samples(self):
+        for key, value in self.collect():
+            if value is not None:
+                yield self.name, _labels(self.labels, key), value
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, *args, **kwargs):
+        return self.register(Histogram(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs):
+        return self.register(Gauge(*args, **kwargs))
+
+    def render(self):
+        """The whole registry in the Prometheus text exposition format (0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(f'{name}{labels} {_number(value)}' for name, labels, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    'cutoff_stage_seconds', 'Time spent per request or load stage', ('stage',))
+
+_request_timings = contextvars.ContextVar('cutoff_request_timings', default=None)
+
+
+@contextmanager
+def stage(name):
+    """Time a block as stage ``name``."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def start_request():
+    """Start collecting stage timings for the current request; returns a token."""
+    return _request_timings.set([]), time.perf_counter()
+
+
+def finish_request(token):
+    """``(stages, total)`` for the request started with ``token``, in seconds.
+
+    Repeated stages are summed, in order of first appearance.
+    """
+    context_token, started = token
+    timings = _request_timings.get() or []
+    _request_timings.reset(context_token)
+    stages = {}
+    for name, elapsed in timings:
+        stages[name] = stages.get(name, 0.0) + elapsed
+    return stages, time.perf_counter() - started
+
+
+def server_timing(stages, total):
+    """``Server-Timing`` header value, durations in milliseconds."""
+    parts = [f'{name};dur={elapsed * 1000:.2f}' for name, elapsed in stages.items()]
+    parts.append(f'total;dur={total * 1000:.2f}')
+    return ', '.join(parts)
@@ -0,0 +1,116 @@
+import pandas as pd
+
+from .ingest import CODE_COLUMNS, bracketed_number, canonical_codes, extract_area, split_merit
+
+
+def normalize_columns(df):
+    # Normalize columns (lowercase, remove spaces) to match code expectations
+    df.columns = df.columns.str.strip().str.lower().str.replace(' ', '_').str.replace('-', '_')
+    return df
+
+
+def normalize_frame(df):
+    """Bring a raw cutoff CSV onto the canonical schema used by the routes.
+
+    Columns are lowercased, the per-source aliases are resolved onto
+    ``rank``, ``percentile``, ``institute_name``, ``course_name``,
+    ``seat_type``, ``institute_code``, ``choice_code`` and ``category``,
+    numeric columns are parsed, codes are canonicalized and the ``area``
+    column is derived from the institute name. Raw columns are kept so templates can still show them.
+    """
+    df = normalize_columns(df)
+
+    # Handle 'All India Merit' specifically for BCA AI (e.g. "1234(98.5)")
+    if 'all_india_merit' in df.columns:
+        parsed = split_merit(df['all_india_merit'])
+        df['rank'] = parsed['rank']
+        df['percentile'] = parsed['percentile']
+
+    # Handle AI file specific column names for cutoff score (Merit Marks/Score -> Percentile)
+    if 'percentile' not in df.columns:
+        if 'merit_marks' in df.columns:
+            df['percentile'] = df['merit_marks']
+        elif 'score' in df.columns:
+            df['percentile'] = df['score']
+        elif 'merit' in df.columns:
+            df['percentile'] = df['merit']
+        elif 'marks_percentile' in df.columns:
+            df['percentile'] = df['marks_percentile']
+        elif 'hsc_percentage' in df.columns:
+            df['percentile'] = df['hsc_percentage']
+        elif 'percentage' in df.columns:
+            df['percentile'] = df['percentage']
+        elif 'hsc_marks' in df.columns:
+            df['percentile'] = df['hsc_marks']
+        else:
+            df['percentile'] = 0.0 # Fallback to prevent KeyError
+
+    # Extract score from brackets if present (e.g. "(50.5)")
+    if not pd.api.types.is_numeric_dtype(df['percentile']):
+        df['percentile'] = bracketed_number(df['percentile'])
+
+    # Handle Rank aliases
+    if 'rank' not in df.columns:
+        if 'merit_no' in df.columns:
+            df['rank'] = df['merit_no']
+        elif 'merit_rank' in df.columns:
+            df['rank'] = df['merit_rank']
+        elif 'merit_score' in df.columns:
+            df['rank'] = df['merit_score']
+
+    # Handle Institution Name aliases (AI files)
+    if 'institute_name' not in df.columns and 'institution_name' in df.columns:
+        df['institute_name'] = df['institution_name']
+
+    # Handle MH file specific column names
+    if 'institute_name' not in df.columns:
+        if 'name_of_institute' in df.columns:
+            df['institute_name'] = df['name_of_institute']
+        elif 'college_name' in df.columns:
+            df['institute_name'] = df['college_name']
+        elif 'institute' in df.columns:
+            df['institute_name'] = df['institute']
+        elif 'name' in df.columns:
+            df['institute_name'] = df['name']
+
+    # Handle Course Name aliases (Common in BCA files)
+    if 'course_name' not in df.columns:
+        if 'branch' in df.columns:
+            df['course_name'] = df['branch']
+        elif 'course' in df.columns:
+            df['course_name'] = df['course']
+        elif 'subject' in df.columns:
+            df['course_name'] = df['subject']
+
+    # Handle Seat Type aliases (AI files)
+    if 'seat_type' not in df.columns and 'type' in df.columns:
+        df['seat_type'] = df['type']
+
+    # Handle Choice Code as Institute Code (User specified)
+    if 'institute_code' not in df.columns and 'choice_code' in df.columns:
+        df['institute_code'] = df['choice_code']
+
+    # Handle Branch Code alias
+    if 'choice_code' not in df.columns and 'branch_code' in df.columns:
+        df['choice_code'] = df['branch_code']
+
+    # Handle Category alias (e.g. category1)
+    if 'category' not in df.columns and 'category1' in df.columns:
+        df['category'] = df['category1']
+
+    for column in CODE_COLUMNS:
+        if column in df.columns:
+            df[column] = canonical_codes(df[column])
+
+    # Ensure numeric columns are actually numbers
+    df['percentile'] = pd.to_numeric(df['percentile'], errors='coerce')
+    if 'rank' in df.columns:
+        df['rank'] = pd.to_numeric(df['rank'], errors='coerce')
+
+    # Extract Area from Institute Name (Format: "Name, Area")
+    if 'institute_name' in df.columns:
+        # The last comma-separated part is the Area
+        df['area'] = extract_area(df['institute_name'])
+
+    return df
+
@@ -0,0 +1,172 @@
+import math
+
+from .metrics import stage
+
+DEFAULT_PAGE_SIZE = 50
+# Cards per /colleges page; further pages load as the grid scrolls
+GRID_PAGE_SIZE = 60
+MAX_PAGE_SIZE = 500
+
+
+def parse_filters(args):
+    """Read the /colleges filter parameters from a request's query args."""
+    return {
+        'department': args.get('department', 'Polytechnic'),
+        'round': args.get('round', '1'),
+        # MTech only loads data if round is explicitly selected
+        'round_selected': args.get('round') is not None,
+        'gender': args.get('gender', ''),
+        'search': args.get('search', '').lower(),
+        'specialty': args.get('specialty', ''),
+        # Using experience field for Cutoff
+        'experience': args.get('experience', '') or args.get('percentile', ''),
+        'rank': args.get('rank', '') or args.get('merit_score', ''),
+        'min_rank': args.get('min_rank', ''),
+        'max_rank': args.get('max_rank', ''),
+        'category': args.get('category', ''),
+        'seat_type': args.get('seat_type', ''),
+        'university': args.get('university', ''),
+        'area': args.get('area', ''),
+    }
+
+
+def parse_page(args, default_per_page=DEFAULT_PAGE_SIZE):
+    """``(page, per_page)`` from query args; page is 1-based, per_page 0 means all."""
+    try:
+        page = max(1, int(args.get('page', 1)))
+    except ValueError:
+        page = 1
+    try:
+        per_page = int(args.get('per_page', default_per_page))
+    except ValueError:
+        per_page = default_per_page
+    return page, min(max(per_page, 0), MAX_PAGE_SIZE)
+
+
+def page_bounds(total, page, per_page):
+    if not per_page:
+        return 0, total
+    start = min((page - 1) * per_page, total)
+    return start, min(start + per_page, total)
+
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(number) else number
+
+
+def cache_key(filters):
+    """Hashable form of ``filters``: empty values dropped, numbers compared as numbers.
+
+    ``rank=500`` and ``rank=500.0`` select the same rows and share a key.
+    """
+    key = []
+    for name, value in sorted(filters.items()):
+        if name in ('experience', 'rank', 'min_rank', 'max_rank') and value:
+            number = _number(value)
+            value = number if number is not None else value
+        if value not in ('', None, False):
+            key.append((name, value))
+    return tuple(key)
+
+
+def _requires_rank_range(filters):
+    # MH tables for MCA, MBA and BCA are too large to list without a rank range
+    return filters['department'] in ('MCA', 'MBA', 'BCA') and filters['gender'] != 'AI'
+
+
+def select_rows(table, filters, gated=True):
+    """Row ids of ``table`` matching ``filters``, by descending percentile.
+
+    Exact-match filters intersect the table's posting lists, the rank and
+    percentile filters are ``searchsorted`` slices of the presorted columns,
+    the name search comes from the table's :class:`SearchIndex`, and the
+    presorted percentile order gives the result order, so no per-request
+    sort runs.
+
+    ``gated=False`` skips the page's "pick a branch / rank range first"
+    gates, so an export can cover a whole round.
+    """
+    with stage('filter'):
+        rows = _matching_rows(table, filters, gated)
+    # None (no filter at all) means every row
+    if rows is not None and not len(rows):
+        return rows
+    with stage('sort'):
+        return table.index.order_by_percentile(rows)
+
+
+def _matching_rows(table, filters, gated=True):
+    # Imported here so parsing filters does not pull in pandas
+    from .index import EMPTY_ROWS
+
+    department = filters['department']
+    location = filters['gender']
+
+    if table is None or not len(table):
+        return EMPTY_ROWS
+
+    # Determine if we should load data (MCA, MBA and BCA allow loading without specialty)
+    if gated and not (filters['specialty'] or department in ('MCA', 'MBA', 'BCA')):
+        return EMPTY_ROWS
+
+    # Enforce Rank Range selection for MCA MH and MBA MH (Don't show colleges until Rank Range is selected)
+    if gated and _requires_rank_range(filters) and not (filters['min_rank'] and filters['max_rank']):
+        return EMPTY_ROWS
+
+    index = table.index
+
+    # Filter by Branch, Area, Category, Seat Type and University (exact match)
+    exact = [(column, filters[name]) for column, name in (
+        ('course_name', 'specialty'),
+        ('area', 'area'),
+        ('category', 'category'),
+        ('seat_type', 'seat_type'),
+        ('university', 'university'),
+    ) if filters[name]]
+
+    # Filter by Quota (Location)
+    # Ignore 'MH' as it is used for file selection, not row filtering
+    # For BCA AI, skip strict quota filtering to ensure data shows from the AI file
+    if location and location != 'MH' and 'quota' in index and not (department == 'BCA' and location == 'AI'):
+        # 'AI' matches 'AI', 'All India', etc. case-insensitive
+        exact.append(('quota', index.quota_rows(location)))
+
+    # Filter by Cutoff (Percentile): show colleges where cutoff is <= user marks
+    user_marks = _number(filters['experience'])
+    if user_marks is not None and index.percentile is not None:
+        exact.append(('percentile', index.percentile.range_rows(high=user_marks)))
+
+    if index.rank is not None:
+        # Filter by Rank: show colleges where cutoff rank >= user rank (User eligible)
+        low = high = None
+        user_rank = _number(filters['rank'])
+        if user_rank is not None:
+            low = user_rank
+
+        # Filter by Rank Range
+        min_rank = _number(filters['min_rank'])
+        max_rank = _number(filters['max_rank'])
+        if min_rank is not None and max_rank is not None:
+            low = min_rank if low is None else max(low, min_rank)
+            high = max_rank
+
+        if low is not None or high is not None:
+            exact.append(('rank', index.rank.range_rows(low, high)))
+
+    # Filter by Search (Institute Name, literal substring)
+    if filters['search'].strip() and 'institute_name' in table.df.columns:
+        exact.append(('institute_name', table.search.rows(filters['search'])))
+
+    return index.intersect(exact)
+
+
+def institute_groups(table, rows):
+    """Split ordered ``rows`` into one array per institute, by first appearance."""
+    if table.institutes is None:
+        return [rows] if len(rows) else []
+    with stage('group'):
+        return table.institutes.groups(rows)
@@ -0,0 +1,82 @@
+# Card fields the templates read, and the normalized column each comes from
+CARD_FIELDS = (
+    ('institute_code', 'institute_code', 'N/A'),
+    ('choice_code', 'choice_code', 'N/A'),
+    ('name', 'institute_name', 'Unknown Institute'),
+    ('specialty', 'course_name', None),    # default depends on the department
+    ('experience', 'percentile', 0),       # Cutoff
+    ('gender', 'quota', None),             # Quota/Location, defaults to the selected one
+    ('qualification', 'category', 'N/A'),  # Category
+    ('consultation_type', 'seat_type', 'N/A'),  # Seat Type
+    ('rank', 'rank', 'N/A'),
+    ('stage', 'stage', 'N/A'),
+    ('image', None, ''),                   # Placeholder
+    ('percentile', 'percentile', 'N/A'),
+    ('merit_score', 'rank', 'N/A'),
+    ('university', 'university', 'N/A'),
+    ('status', 'status', 'N/A'),
+)
+
+# Fields of the compact JSON rows served by /api/colleges
+ROW_FIELDS = (
+    'institute_code', 'choice_code', 'institute_name', 'course_name', 'category', 'quota',
+    'seat_type', 'rank', 'percentile', 'status', 'university', 'area', 'stage',
+)
+
+DEFAULT_SPECIALTY = {'BCA': 'BCA', 'MTECH': 'MTECH', 'MBA': 'MBA', 'MCA': 'MCA'}
+
+
+def _column_values(series):
+    if series.hasnans:
+        series = series.astype(object).where(series.notna(), None)
+    return series.tolist()
+
+
+def to_records(df, dept_filter, location_filter):
+    """Turn filtered rows into the card dicts the college templates render.
+
+    Every row keeps its own columns and gains the card aliases from
+    ``CARD_FIELDS``. Missing values become ``None`` so the ``data-doctor``
+    JSON stays valid. Columns are projected once for the whole frame rather
+    than row by row.
+    """
+    if df.empty:
+        return []
+
+    defaults = {
+        'specialty': DEFAULT_SPECIALTY.get(dept_filter, 'N/A'),
+        'gender': location_filter if location_filter else 'N/A',
+    }
+    columns = {column: _column_values(df[column]) for column in df.columns}
+
+    n_rows = len(df)
+    for field, column, default in CARD_FIELDS:
+        if column is not None and column in columns:
+            columns[field] = columns[column]
+        else:
+            columns[field] = [defaults.get(field, default)] * n_rows
+
+    keys = list(columns)
+    return [dict(zip(keys, row)) for row in zip(*columns.values())]
+
+
+def to_rows(df, fields=ROW_FIELDS):
+    """Plain JSON rows with only the canonical ``fields`` the table has."""
+    fields = [field for field in fields if field in df.columns]
+    columns = [_column_values(df[field]) for field in fields]
+    return [dict(zip(fields, row)) for row in zip(*columns)]
+
+
+def group_by_institute(records, sizes):
+    """Collapse MTech cards into one card per institute with all its ``cutoffs``.
+
+    ``records`` are grouped already (see :func:`cutoffs.query.institute_groups`),
+    ``sizes`` is the number of cards of each institute in order.
+    """
+    grouped = []
+    start = 0
+    for size in sizes:
+        stop = start + size
+        grouped.append(dict(records[start], cutoffs=records[start:stop]))
+        start = stop
+    return grouped
@@ -0,0 +1,161 @@
+"""Where every cutoff dataset lives under data/, declared in one place.
+
+Each :class:`DatasetRule` names a department and quota, the directory
+holding its CSVs and a filename pattern whose ``round`` group gives the
+CAP round (and optional ``year``/``year_end`` groups the academic year).
+:func:`discover` walks data/ once and returns every matching file; the
+store resolves requests against that listing, so serving a request never
+touches the filesystem.
+
+Directory and filename matching is case-insensitive (the data tree has
+both ``mca/MH`` and ``mba/mh``). Spreadsheet leftovers such as
+``cap1_backup.csv``, ``backup_cap1.csv`` or ``cap1 - Copy.csv`` never
+count, even where a loose pattern would match them, and when two files
+claim the same department, quota, round and year only the first (by
+name) does. :func:`scan` also reports what it left out and why.
+"""
+import os
+import re
+
+DEPARTMENTS = ('Polytechnic', 'MTECH', 'MCA', 'MBA', 'BCA')
+# Departments whose CAP files are split into All India and Maharashtra quotas
+QUOTA_DEPARTMENTS = ('MCA', 'MBA', 'BCA')
+ROUNDS = ('1', '2', '3', '4')
+
+_YEAR = r'(?P<year>\d{4})_(?P<year_end>\d{2})'
+
+# Backups, copies and editor lock files: 'cap1_backup.csv', 'old_cap1.csv', 'cap1 (2).csv', '~$cap1.csv'
+LEFTOVER = re.compile(r'^[.~]|(?:^|[\W_])(?:backup|bak|copy|old|orig|tmp)(?:[\W_]|$)|\(\d+\)', re.IGNORECASE)
+
+
+class DatasetRule:
+    """How to find the CSVs of one department and quota.
+
+    ``fallback`` lets a round without its own file use the latest earlier
+    round instead (BCA publishes fewer rounds than the others).
+    """
+
+    __slots__ = ('department', 'quota', 'directory', 'pattern', 'fallback')
+
+    def __init__(self, department, quota, directory, pattern, fallback=False):
+        self.department = department
+        self.quota = quota
+        self.directory = directory
+        self.pattern = re.compile(pattern, re.IGNORECASE)
+        self.fallback = fallback
+
+
+RULES = (
+    DatasetRule('Polytechnic', '', 'polytechnic', r'polytechnic_cutoff_data_cap_(?P<round>\d)\.csv'),
+    DatasetRule('MTECH', '', 'MTECH_ME', r'cap(?P<round>\d)\.csv'),
+    DatasetRule('MCA', 'AI', 'mca/AI', rf'PG_MCA_Diploma_CAP(?P<round>\d)_AI_Cutoff_{_YEAR}_cleaned\.csv'),
+    # Both the Cuttoff and Cutoff spellings occur
+    DatasetRule('MCA', 'MH', 'mca/MH', r'PG_MCA_CAP(?P<round>\d)_Cutt?off_data\.csv'),
+    DatasetRule('MBA', 'AI', 'mba/AI', r'MBA_CAP(?P<round>\d)_AI - MBA_CAP\d_AI\.csv'),
+    DatasetRule('MBA', 'MH', 'mba/MH', rf'MBA_CAP(?P<round>\d)_MHCutOff_{_YEAR} - .*\.csv'),
+    # 'cap1.csv', 'CAP1.csv', 'BCA_CAP1.csv', ...
+    DatasetRule('BCA', 'AI', 'bca/AI', r'(?:\w+_)?cap(?P<round>\d)\.csv', fallback=True),
+    DatasetRule('BCA', 'MH', 'bca/MH', r'(?:\w+_)?cap(?P<round>\d)\.csv', fallback=True),
+)
+
+
+class Dataset:
+    """One CSV matched by a rule: ``(department, quota, round, year) -> path``."""
+
+    __slots__ = ('department', 'quota', 'round', 'year', 'path')
+
+    def __init__(self, department, quota, round_no, year, path):
+        self.department = department
+        self.quota = quota
+        self.round = round_no
+        self.year = year
+        self.path = path
+
+    @property
+    def key(self):
+        return self.department, self.quota, self.round
+
+    def __repr__(self):
+        return f'Dataset({self.department!r}, {self.quota!r}, {self.round!r}, {self.year!r}, {self.path!r})'
+
+
+def table_key(department, location, round_no):
+    """Canonical (department, quota, round) key for a request.
+
+    Any department the routes do not know about falls through to the
+    polytechnic tables, and only the quota-split departments keep the
+    AI/MH distinction.
+    """
+    if department not in DEPARTMENTS:
+        department = 'Polytechnic'
+    if department in QUOTA_DEPARTMENTS:
+        quota = 'AI' if location == 'AI' else 'MH'
+    else:
+        quota = ''
+    return department, quota, str(round_no)
+
+
+def _find_dir(data_dir, directory):
+    """``data_dir/directory`` with every component matched case-insensitively."""
+    path = data_dir
+    for part in directory.split('/'):
+        try:
+            names = os.listdir(path)
+        except OSError:
+            return None
+        match = next((n for n in names if n.lower() == part.lower() and os.path.isdir(os.path.join(path, n))), None)
+        if match is None:
+            return None
+        path = os.path.join(path, match)
+    return path
+
+
+def scan(data_dir, rules=RULES):
+    """``(datasets, ignored)``: what :func:`discover` returns, plus ``(path, reason)`` for every
+    CSV in a dataset directory that it left out.
+    """
+    datasets, ignored = [], []
+    for rule in rules:
+        directory = _find_dir(data_dir, rule.directory)
+        if directory is None:
+            continue
+        found = {}
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if not name.lower().endswith('.csv') or not os.path.isfile(path):
+                continue
+            match = rule.pattern.fullmatch(name)
+            if LEFTOVER.search(name):
+                ignored.append((path, 'backup or copy'))
+                continue
+            if match is None or match['round'] not in ROUNDS:
+                ignored.append((path, f'name does not match {rule.pattern.pattern}'))
+                continue
+            groups = match.groupdict()
+            year = f"{groups['year']}-{groups['year_end']}" if groups.get('year') else None
+            dataset = Dataset(rule.department, rule.quota, match['round'], year, path)
+            first = found.setdefault((dataset.round, year), dataset)
+            if first is not dataset:
+                ignored.append((path, f'duplicate of {os.path.relpath(first.path, data_dir)}'))
+        found = list(found.values())
+        datasets += found
+
+        rounds = {dataset.round for dataset in found}
+        if rule.fallback and found:
+            for round_no in ROUNDS:
+                if round_no in rounds:
+                    continue
+                earlier = [d for d in found if d.round < round_no]
+                source = max(earlier, key=lambda d: d.round) if earlier else min(found, key=lambda d: d.round)
+                datasets.append(Dataset(rule.department, rule.quota, round_no, source.year, source.path))
+    return datasets, ignored
+
+
+def discover(data_dir, rules=RULES):
+    """Every dataset under ``data_dir``, by department, quota, round and year.
+
+    Rounds missing for a ``fallback`` rule get the latest earlier round's
+    dataset (or the earliest one, if none is earlier), as a separate entry
+    sharing its path.
+    """
+    return scan(data_dir, rules)[0]
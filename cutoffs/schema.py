@@ -0,0 +1,97 @@
+"""The canonical cutoff table schema and validation against it.
+
+:func:`cutoffs.normalize.normalize_frame` maps every source's columns onto
+one set of names. What it cannot do is tell whether a file (or a row) is
+usable. :func:`check_columns` answers that for a whole file, and
+:func:`validate_frame` splits a normalized frame into the rows the app
+serves and the rejects, each with its reasons and CSV line number, for
+``python -m cutoffs.compile`` to report. The store applies the same split
+when it parses a CSV itself, so compiled and parsed tables hold the same
+rows.
+"""
+import numpy as np
+import pandas as pd
+
+# Canonical columns the routes read, and what they hold
+SCHEMA = {
+    'institute_code': 'code',
+    'choice_code': 'code',
+    'institute_name': 'text',
+    'course_name': 'text',
+    'category': 'text',
+    'seat_type': 'text',
+    'quota': 'text',
+    'university': 'text',
+    'status': 'text',
+    'stage': 'text',
+    'area': 'text',
+    'rank': 'number',
+    'percentile': 'number',
+}
+
+# Without these a file is not served at all
+REQUIRED_COLUMNS = ('institute_name',)
+# Without these filters and cards fall back to defaults, which is worth a warning
+EXPECTED_COLUMNS = ('institute_code', 'course_name', 'category', 'rank')
+
+# Line 1 of a CSV is its header, so row i of the frame is line i + 2
+FIRST_DATA_LINE = 2
+
+
+def _blank(series):
+    if pd.api.types.is_numeric_dtype(series):
+        return series.isna().to_numpy()
+    return (series.isna() | (series.astype(str).str.strip() == '')).to_numpy()
+
+
+def check_columns(df):
+    """``(errors, warnings)`` about a normalized frame as a whole."""
+    errors, warnings = [], []
+    if not len(df):
+        errors.append('no rows')
+    for column in REQUIRED_COLUMNS:
+        if column not in df.columns:
+            errors.append(f'no {column} column')
+    # normalize_frame falls back to a constant 0.0 percentile when the file has none
+    if 'rank' not in df.columns and len(df) and not df['percentile'].fillna(0).any():
+        errors.append('no rank or percentile column')
+    for column in EXPECTED_COLUMNS:
+        if column not in df.columns:
+            warnings.append(f'no {column} column')
+    return errors, warnings
+
+
+def validate_frame(df):
+    """Split a normalized frame into ``(valid, rejects)``.
+
+    ``valid`` keeps the passing rows, renumbered from 0. ``rejects`` holds
+    the others with ``line`` (in the source CSV) and ``reason`` columns in
+    front. A row is rejected when it names no institute, has neither a
+    rank nor a percentile, has a rank below 1 or a negative percentile, or
+    repeats an earlier row exactly.
+    """
+    n = len(df)
+    rank = df['rank'].to_numpy(dtype=np.float64, na_value=np.nan) if 'rank' in df.columns else np.full(n, np.nan)
+    percentile = df['percentile'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    no_institute = _blank(df['institute_name']) if 'institute_name' in df.columns else np.ones(n, dtype=bool)
+    if 'institute_code' in df.columns:
+        no_institute = no_institute & _blank(df['institute_code'])
+    checks = (
+        ('no institute', no_institute),
+        ('no rank or percentile', np.isnan(rank) & np.isnan(percentile)),
+        ('rank below 1', rank < 1),
+        ('negative percentile', percentile < 0),
+        ('duplicate row', df.duplicated().to_numpy()),
+    )
+
+    bad = np.zeros(n, dtype=bool)
+    for _, failed in checks:
+        bad |= failed
+    rows = np.flatnonzero(bad)
+    rejects = df.take(rows).reset_index(drop=True)
+    rejects.insert(0, 'reason', ['; '.join(name for name, failed in checks if failed[i]) for i in rows])
+    rejects.insert(0, 'line', rows + FIRST_DATA_LINE)
+    if not len(rows):
+        return df, rejects
+    return df.take(np.flatnonzero(~bad)).reset_index(drop=True), rejects
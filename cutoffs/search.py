@@ -0,0 +1,197 @@
+"""Institute search over one cutoff table.
+
+The /colleges ``search`` filter is a case-insensitive, literal substring
+match on institute names (all-digit queries also match institute and
+choice code prefixes). Instead of scanning every row per keystroke, the
+distinct institutes are indexed once:
+
+* a trigram -> institutes posting map narrows a substring query to the
+  institutes containing all of its trigrams, which are then verified,
+* a word vocabulary, itself trigram-indexed, lets autocomplete match
+  word prefixes and words one typo away,
+* sorted code lists answer code prefixes with ``bisect``.
+
+Institute hits map back to table rows through a :class:`ColumnIndex`
+over the name column.
+"""
+import bisect
+import re
+
+import numpy as np
+
+from .index import EMPTY_ROWS, ColumnIndex
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Lowercased text with runs of whitespace collapsed."""
+    return ' '.join(str(text).lower().split())
+
+
+def tokens(text):
+    return _NON_WORD.sub(' ', str(text).lower()).split()
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def within_one_edit(a, b):
+    """True when ``a`` and ``b`` differ by at most one insert, delete or substitution."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i:] == b[i + 1:]
+
+
+class SearchIndex:
+    """Substring, prefix and typo-tolerant lookup of the institutes in a table."""
+
+    def __init__(self, df):
+        self.names = ColumnIndex(df['institute_name']) if 'institute_name' in df.columns else None
+        institutes = [name for name in self.names.values if isinstance(name, str)] if self.names else []
+        self.institutes = institutes
+        self.lower = [normalize(name) for name in institutes]
+        self.n_rows = [len(self.names.rows(name)) for name in institutes]
+        first_rows = [int(self.names.rows(name)[0]) for name in institutes]
+
+        def first_values(column):
+            if column not in df.columns:
+                return [None] * len(institutes)
+            values = df[column].take(first_rows).astype(object)
+            return values.where(values.notna(), None).tolist()
+
+        self.areas = first_values('area')
+        self.codes = first_values('institute_code')
+
+        self._grams = {}
+        self._words = {}
+        for doc, text in enumerate(self.lower):
+            for gram in trigrams(text):
+                self._grams.setdefault(gram, set()).add(doc)
+            for word in tokens(text):
+                self._words.setdefault(word, set()).add(doc)
+        self._word_grams = {}
+        for word in self._words:
+            for gram in trigrams(f'^{word}$'):
+                self._word_grams.setdefault(gram, set()).add(word)
+        self._sorted_words = sorted(self._words)
+
+        # (code, institute) pairs for institute and choice codes, sorted for prefix lookups
+        position = {name: doc for doc, name in enumerate(institutes)}
+        pairs = set()
+        for column in ('institute_code', 'choice_code'):
+            if column in df.columns and 'institute_name' in df.columns:
+                for code, name in zip(df[column].tolist(), df['institute_name'].tolist()):
+                    if isinstance(code, str) and name in position:
+                        pairs.add((code, position[name]))
+        self._codes = sorted(pairs)
+        self._code_keys = [code for code, _ in self._codes]
+
+    def substring(self, query):
+        """Institutes whose name contains ``query`` literally (case-insensitive)."""
+        query = normalize(query)
+        if not query:
+            return set(range(len(self.lower)))
+        grams = trigrams(query)
+        if grams:
+            postings = sorted((self._grams.get(gram, set()) for gram in grams), key=len)
+            candidates = set.intersection(*postings)
+        else:
+            candidates = range(len(self.lower))
+        return {doc for doc in candidates if query in self.lower[doc]}
+
+    def code_prefix(self, query):
+        query = query.strip()
+        start = bisect.bisect_left(self._code_keys, query)
+        stop = bisect.bisect_left(self._code_keys, query + '\uffff')
+        return {doc for _, doc in self._codes[start:stop]}
+
+    def rows(self, query):
+        """Sorted row ids matching the /colleges ``search`` filter."""
+        docs = self.substring(query)
+        if query.strip().isdigit():
+            docs |= self.code_prefix(query)
+        if not docs:
+            return EMPTY_ROWS
+        return np.sort(np.concatenate([self.names.rows(self.institutes[doc]) for doc in docs]))
+
+    def _word_matches(self, word, prefix):
+        """Vocabulary words equal to ``word``, starting with it (``prefix``) or one edit away."""
+        matches = set()
+        if prefix:
+            start = bisect.bisect_left(self._sorted_words, word)
+            for vocab in self._sorted_words[start:]:
+                if not vocab.startswith(word):
+                    break
+                matches.add(vocab)
+        elif word in self._words:
+            matches.add(word)
+        if len(word) >= 4:
+            candidates = set()
+            for gram in trigrams(f'^{word}$'):
+                candidates |= self._word_grams.get(gram, set())
+            matches |= {vocab for vocab in candidates if within_one_edit(word, vocab)}
+        return matches
+
+    def fuzzy(self, query):
+        """Institutes containing a close match of every query word (the last one as a prefix)."""
+        words = tokens(query)
+        docs = None
+        for i, word in enumerate(words):
+            found = set()
+            for vocab in self._word_matches(word, prefix=i == len(words) - 1):
+                found |= self._words[vocab]
+            docs = found if docs is None else docs & found
+            if not docs:
+                return set()
+        return docs or set()
+
+    def suggest(self, query, k=8):
+        """Top ``k`` institutes for an autocomplete box, best match first.
+
+        Name prefixes rank first, then word prefixes and code prefixes,
+        other substrings, area matches and finally typo-tolerant matches;
+        ties go to the institute with more cutoff rows.
+        """
+        query = normalize(query)
+        if not query or not self.institutes:
+            return []
+
+        tiers = {}
+
+        def add(docs, tier):
+            for doc in docs:
+                if tier < tiers.get(doc, 99):
+                    tiers[doc] = tier
+
+        for doc in self.substring(query):
+            text = self.lower[doc]
+            if text.startswith(query):
+                add((doc,), 0)
+            elif f' {query}' in text:
+                add((doc,), 1)
+            else:
+                add((doc,), 2)
+        if query.isdigit():
+            add(self.code_prefix(query), 1)
+        if len(tiers) < k:
+            add((doc for doc, area in enumerate(self.areas)
+                 if isinstance(area, str) and area.lower().startswith(query)), 3)
+        if len(tiers) < k:
+            add(self.fuzzy(query), 4)
+
+        best = sorted(tiers, key=lambda doc: (tiers[doc], -self.n_rows[doc], self.lower[doc]))[:k]
+        return [{
+            'institute_name': self.institutes[doc],
+            'institute_code': self.codes[doc],
+            'area': self.areas[doc],
+            'rows': self.n_rows[doc],
+        } for doc in best]
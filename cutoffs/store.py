@@ -0,0 +1,336 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+
+from .cache import MISSING
+from .metrics import stage
+from .registry import discover, table_key
+
+# The pandas-backed modules (columnar, compact, index, ingest, normalize,
+# schema, search) are imported when the first table is built, so an app with a
+# lazy loading policy is up before pandas is.
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def data_fingerprint(data_dir, sources):
+    """Digest of every loaded file's path and content.
+
+    Unlike ``version`` it is the same in every process that loaded the same
+    files, so it can go into ETags shared by several workers and a CDN.
+    """
+    digest = hashlib.sha256()
+    for path, file_hash in sorted((os.path.relpath(s.path, data_dir), s.digest) for s in sources):
+        digest.update(f'{path}\0{file_hash}\n'.encode())
+    return digest.hexdigest()
+
+
+class CutoffTable:
+    """One normalized cutoff CSV with its filter indexes and dropdown values."""
+
+    def __init__(self, path, df, digest=None):
+        self.path = path
+        self.df = df
+        self.digest = digest
+        from .index import InstituteIndex, TableIndex
+        from .search import SearchIndex
+
+        with stage('index'):
+            self.index = TableIndex(df)
+            self.search = SearchIndex(df)
+            self.institutes = InstituteIndex(df) if 'institute_code' in df.columns else None
+        self.courses = self.index.values('course_name')
+        self.categories = self.index.values('category')
+        self.seat_types = self.index.values('seat_type')
+        self.universities = self.index.values('university')
+        self.quotas = self.index.values('quota')
+
+        # Move 'Others' to the end
+        self.areas = [a for a in self.index.values('area') if a != 'Others']
+        if len(self.areas) < len(self.index.values('area')):
+            self.areas.append('Others')
+
+        self.facet_counts = {column: self.index.counts(column) for column in self.index.columns}
+
+    def __len__(self):
+        return len(self.df)
+
+
+def load_table(csv_path, digest=None):
+    from .compact import compact_frame
+    from .ingest import read_csv
+    from .normalize import normalize_frame
+    from .schema import check_columns, validate_frame
+
+    with stage('load'):
+        raw = read_csv(csv_path)
+    with stage('normalize'):
+        df = normalize_frame(raw)
+    errors, _ = check_columns(df)
+    if errors:
+        raise ValueError(f"{csv_path}: {'; '.join(errors)}")
+    with stage('validate'):
+        df, rejects = validate_frame(df)
+    if len(rejects):
+        logger.warning("Dropped %d invalid rows of %s (python -m cutoffs.compile reports them)",
+                       len(rejects), csv_path)
+    with stage('compact'):
+        compact_frame(df)
+    return CutoffTable(csv_path, df, digest)
+
+
+class SourceFile:
+    """A CSV backing one or more tables, with the fingerprint it was loaded at."""
+
+    __slots__ = ('path', 'mtime_ns', 'size', 'digest', 'table')
+
+    def __init__(self, path, mtime_ns, size, digest, table):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.digest = digest
+        self.table = table
+
+
+class CutoffStore:
+    """Normalized cutoff tables keyed by (department, quota, round).
+
+    Every table is parsed once and request handlers only look tables up and
+    filter them. The CSVs come from the dataset registry
+    (:mod:`cutoffs.registry`); keys that resolve to the same file (the BCA
+    round fallback) share one table.
+
+    When ``compiled_dir`` holds an up-to-date build of a CSV (see
+    ``python -m cutoffs.compile``) the table is memory-mapped from there
+    instead of being parsed.
+
+    :meth:`refresh` re-resolves the data tree and rebuilds only the tables
+    whose source file changed (by mtime and size, confirmed by content
+    hash). The new mapping is swapped in with a single assignment, so a
+    request always sees either the old or the new set of tables, never a
+    half-loaded one. :meth:`watch` runs refresh periodically in a daemon
+    thread.
+
+    ``departments`` limits which departments are loaded; the CSVs of the
+    others are only fingerprinted, so :attr:`fingerprint` (and every ETag
+    built from it) is the same however much of the data a process has
+    loaded. :meth:`require` adds departments, and :meth:`get` requires the
+    department it is asked for, so a store started with ``departments=()``
+    loads each department on its first request.
+    """
+
+    def __init__(self, base_dir, compiled_dir=None, departments=None):
+        self.base_dir = base_dir
+        self.data_dir = os.path.join(base_dir, 'data')
+        self.compiled_dir = compiled_dir or os.path.join(self.data_dir, 'compiled')
+        self.departments = None if departments is None else frozenset(departments)
+        self._tables = {}
+        self._by_year = {}
+        self._datasets = []
+        self._discovered = []
+        self._sources = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._listeners = []
+        self.version = 0
+        self.fingerprint = None
+        self.reload_count = 0
+        self.last_load_duration = None
+        self.last_loaded_at = None
+
+    def _wanted(self, department, departments=MISSING):
+        departments = self.departments if departments is MISSING else departments
+        return departments is None or department in departments
+
+    def _load_source(self, csv_path, load=True):
+        """Return ``(source, changed)`` for a CSV, reusing the loaded table if unchanged.
+
+        With ``load=False`` the file is only hashed and ``source.table`` is ``None``.
+        """
+        previous = self._sources.get(csv_path)
+        st = os.stat(csv_path)
+        unchanged = previous is not None and (previous.mtime_ns, previous.size) == (st.st_mtime_ns, st.st_size)
+        if unchanged and (previous.table is not None or not load):
+            return previous, False
+        if not load:
+            return SourceFile(csv_path, st.st_mtime_ns, st.st_size, file_digest(csv_path), None), True
+
+        from .columnar import compiled_path, read_frame, read_meta
+
+        out_dir = compiled_path(self.compiled_dir, self.data_dir, csv_path)
+        meta = read_meta(out_dir)
+        source = meta['source'] if meta else {}
+        if unchanged:
+            digest = previous.digest
+        elif (source.get('mtime_ns'), source.get('size')) == (st.st_mtime_ns, st.st_size):
+            # The compile step already hashed this exact file
+            digest = source['sha256']
+        else:
+            digest = file_digest(csv_path)
+        if previous is not None and previous.digest == digest and previous.table is not None:
+            # Touched but not modified
+            return SourceFile(csv_path, st.st_mtime_ns, st.st_size, digest, previous.table), False
+
+        if source.get('sha256') == digest:
+            logger.debug("Mapping compiled cutoff table %s", out_dir)
+            with stage('load'):
+                df = read_frame(out_dir, meta)
+            table = CutoffTable(csv_path, df, digest)
+        else:
+            logger.debug("Loading cutoff table %s", csv_path)
+            table = load_table(csv_path, digest)
+        return SourceFile(csv_path, st.st_mtime_ns, st.st_size, digest, table), True
+
+    def refresh(self):
+        """Pick up added, changed and removed CSVs. Returns the reloaded paths."""
+        with self._lock:
+            return self._refresh(self.departments)
+
+    def _refresh(self, departments):
+        # ``departments`` only takes effect with the tables it loads, so a
+        # concurrent require() never sees a department before its tables
+        started = time.perf_counter()
+        tables = {}
+        by_year = {}
+        sources = {}
+        changed = []
+        datasets = discover(self.data_dir)
+        # Oldest first, so each (department, quota, round) ends on its latest year
+        for dataset in sorted(datasets, key=lambda d: d.year or ''):
+            csv_path = dataset.path
+            if csv_path not in sources:
+                try:
+                    source, is_new = self._load_source(csv_path, self._wanted(dataset.department, departments))
+                except Exception:
+                    # Keep serving the previous table if a file is mid-copy or malformed
+                    logger.exception("Failed to load cutoff table %s", csv_path)
+                    source, is_new = self._sources.get(csv_path), False
+                    if source is None:
+                        continue
+                sources[csv_path] = source
+                if is_new:
+                    changed.append(csv_path)
+            if sources[csv_path].table is not None:
+                tables[dataset.key] = sources[csv_path].table
+                by_year[dataset.key + (dataset.year,)] = sources[csv_path].table
+
+        removed = set(self._sources) - set(sources)
+        if self.version and not changed and not removed and by_year.keys() == self._by_year.keys():
+            self._sources = sources
+            self.departments = departments
+            return []
+
+        self._sources = sources
+        self._tables = tables
+        self._by_year = by_year
+        self._discovered = datasets
+        self._datasets = [d for d in datasets if d.path in sources and sources[d.path].table is not None]
+        self.departments = departments
+        self.fingerprint = data_fingerprint(self.data_dir, sources.values())
+        if self.version:
+            self.reload_count += 1
+        self.version += 1
+        self.last_load_duration = time.perf_counter() - started
+        self.last_loaded_at = time.time()
+        logger.info("Loaded %d cutoff tables (%d files changed, %d removed) in %.3fs",
+                    len(tables), len(changed), len(removed), self.last_load_duration)
+        for callback in self._listeners:
+            callback(changed)
+        return changed
+
+    def require(self, *departments):
+        """Load ``departments`` (all of them when none are given) unless they already are.
+
+        Concurrent callers wait for the same load rather than repeating it.
+        """
+        def loaded():
+            return self.departments is None or (departments and self.departments.issuperset(departments))
+
+        if loaded():
+            return
+        with self._lock:
+            if loaded():
+                return
+            self._refresh(self.departments.union(departments) if departments else None)
+
+    def load(self):
+        self.refresh()
+        return self
+
+    def on_reload(self, callback):
+        """Call ``callback(changed_paths)`` after every swap to a new set of tables."""
+        self._listeners.append(callback)
+
+    def watch(self, interval):
+        """Poll the data tree every ``interval`` seconds in a background thread."""
+        if self._watcher is not None:
+            return self._watcher
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.refresh()
+                except Exception:
+                    logger.exception("Cutoff data refresh failed")
+
+        self._watcher = threading.Thread(target=run, name='cutoff-store-watcher', daemon=True)
+        self._watcher.start()
+        return self._watcher
+
+    def get(self, department, location, round_no, year=None):
+        """Return the table for a request, or ``None`` if no CSV backs it.
+
+        Without ``year`` the latest year on file is used.
+        """
+        key = table_key(department, location, round_no)
+        if not self._wanted(key[0]):
+            self.require(key[0])
+        if year is not None:
+            return self._by_year.get(key + (year,))
+        return self._tables.get(key)
+
+    def keys(self):
+        return list(self._tables)
+
+    def datasets(self):
+        """The registry entries behind the loaded tables."""
+        return list(self._datasets)
+
+    def pending(self):
+        """Departments with CSVs on disk that are not loaded yet."""
+        return sorted({d.department for d in self._discovered if not self._wanted(d.department)})
+
+    def table_status(self):
+        """Every CSV the registry found, with whether (and how many rows) it is loaded."""
+        status = []
+        for dataset in self._discovered:
+            source = self._sources.get(dataset.path)
+            table = source.table if source is not None else None
+            status.append({'department': dataset.department, 'quota': dataset.quota, 'round': dataset.round,
+                           'year': dataset.year, 'file': os.path.relpath(dataset.path, self.data_dir),
+                           'loaded': table is not None, 'rows': len(table) if table is not None else None})
+        return status
+
+    def stats(self):
+        return {
+            'version': self.version,
+            'fingerprint': self.fingerprint,
+            'tables': len(self._tables),
+            'files': len(self._sources),
+            'departments': 'all' if self.departments is None else sorted(self.departments),
+            'pending': self.pending(),
+            'reload_count': self.reload_count,
+            'last_load_duration': self.last_load_duration,
+            'last_loaded_at': self.last_loaded_at,
+        }
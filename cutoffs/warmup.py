@@ -0,0 +1,117 @@
+"""Loading policies: when a process loads its cutoff tables.
+
+``eager``
+    Every table is loaded before :meth:`Loader.start` returns, as the app
+    used to do at import. Right for a gunicorn master that preloads and
+    forks.
+``lazy``
+    Only the data tree is scanned and fingerprinted; each department is
+    loaded by the first request that needs it (see
+    :meth:`cutoffs.store.CutoffStore.require`).
+``background``
+    Starts like ``lazy``, then a daemon thread loads every department and
+    runs the warm-up steps (history and eligibility indexes). Requests
+    arriving before it finishes load what they need themselves.
+
+With ``lazy`` and ``background`` a worker takes traffic as soon as the app
+is created, without waiting on pandas or the tables. :meth:`Loader.status`
+is what the readiness endpoint reports.
+"""
+import logging
+import os
+import threading
+import time
+
+POLICIES = ('eager', 'lazy', 'background')
+
+logger = logging.getLogger(__name__)
+
+
+def process_age():
+    """Seconds since this process started (Linux), or ``None``."""
+    try:
+        with open('/proc/self/stat', encoding='ascii') as fh:
+            # Field 22, counted after the parenthesized command name, which may hold spaces
+            started = int(fh.read().rpartition(')')[2].split()[19])
+        with open('/proc/uptime', encoding='ascii') as fh:
+            uptime = float(fh.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return max(uptime - started / os.sysconf('SC_CLK_TCK'), 0.0)
+
+
+class Loader:
+    """Applies a loading policy to a :class:`~cutoffs.store.CutoffStore` and tracks its progress.
+
+    ``warm`` is a sequence of callables the ``background`` thread runs once
+    every table is in, to build the derived tables before a request does.
+    """
+
+    def __init__(self, store, policy='eager', warm=()):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown loading policy {policy!r}; use one of {', '.join(POLICIES)}")
+        self.store = store
+        self.policy = policy
+        self.warm = tuple(warm)
+        self.timings = {}
+        self.error = None
+        self._thread = None
+
+    def _mark(self, name, started):
+        self.timings[f'{name}_seconds'] = round(time.perf_counter() - started, 4)
+        self.timings[f'{name}_process_age'] = process_age()
+
+    def start(self):
+        started = time.perf_counter()
+        if self.policy == 'eager':
+            self.store.require()
+        else:
+            self.store.refresh()
+        self._mark('ready', started)
+        if self.policy == 'background':
+            self._thread = threading.Thread(target=self._warm_up, args=(started,), name='cutoff-warmup',
+                                            daemon=True)
+            self._thread.start()
+        return self
+
+    def _warm_up(self, started):
+        try:
+            # One department at a time, so a request for another one waits for at most one load
+            for department in self.store.pending():
+                self.store.require(department)
+            self.store.require()
+            for step in self.warm:
+                step()
+        except Exception as e:
+            # Requests still load what they need; the readiness report shows the failure
+            logger.exception("Cutoff warm-up failed")
+            self.error = repr(e)
+            return
+        self._mark('warm', started)
+        logger.info("Warmed up in %.3fs", self.timings['warm_seconds'])
+
+    def wait(self, timeout=None):
+        """Block until the background warm-up (if any) has finished."""
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def is_warm(self):
+        """Every table is loaded (and, for ``background``, the warm-up steps have run)."""
+        if self.policy == 'background' and 'warm_seconds' not in self.timings:
+            return False
+        return self.store.version > 0 and not self.store.pending()
+
+    def status(self):
+        tables = self.store.table_status()
+        return {
+            'policy': self.policy,
+            'ready': self.store.version > 0,
+            'warm': self.is_warm,
+            'loaded': sum(table['loaded'] for table in tables),
+            'total': len(tables),
+            'pending': self.store.pending(),
+            'error': self.error,
+            'timings': dict(self.timings),
+            'tables': tables,
+        }
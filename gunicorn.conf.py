@@ -0,0 +1,57 @@
+"""gunicorn settings: load the cutoff tables once in the master, share them with every worker.
+
+    gunicorn app:app
+
+The master compiles any changed CSVs into the memory-mapped columnar
+format, imports the app (loading every table and the derived history and
+eligibility indexes) and freezes the garbage collector's view of those
+objects before forking. Workers then share the mapped column files through
+the page cache and everything else copy-on-write. Check with
+``python -m cutoffs.memory <master pid>``.
+
+With ``CUTOFF_LOADING=lazy`` or ``background`` there is no preloading:
+each worker imports the app on its own and serves within a fraction of a
+second, loading departments as they are requested (or all of them in a
+background thread). That suits autoscaled single-worker containers,
+where a fresh worker should pass its readiness probe (``/ready``) fast.
+"""
+import gc
+import logging
+import multiprocessing
+import os
+
+from cutoffs.compile import compile_tables
+
+bind = os.environ.get('BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+# eager loads everything in the master and forks; lazy/background workers start empty and load for themselves
+loading = os.environ.get('CUTOFF_LOADING', 'eager')
+preload_app = loading == 'eager'
+
+# The master only loads; each worker runs its own reload watcher after the fork
+reload_interval = float(os.environ.get('CUTOFF_RELOAD_INTERVAL', '30'))
+os.environ['CUTOFF_RELOAD_INTERVAL'] = '0'
+
+
+# preload_app imports the app before any server hook runs, so compile while the config loads
+if os.environ.get('CUTOFF_COMPILE', '1') != '0':
+    compiled, skipped = compile_tables(workers=multiprocessing.cpu_count())
+    logging.getLogger('gunicorn.error').info(
+        "Compiled %d cutoff tables (%d up to date)", len(compiled), len(skipped))
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    import app
+
+    app.preload()
+    # Keep the collector from writing to (and so copying) the preloaded objects' pages
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if reload_interval > 0:
+        import app
+
+        app.store.watch(reload_interval)